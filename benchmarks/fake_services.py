@@ -0,0 +1,333 @@
+"""
+Локальные заглушки внешних сервисов для нагрузочных тестов без сети.
+
+Один aiohttp-сервер имитирует:
+    Weatherstack — GET /current, для неизвестных городов ошибка 615;
+    Cat Facts — GET /fact и постраничный GET /facts;
+    Telegram Bot API — /bot<token>/<method>: getMe, getUpdates, sendMessage, editMessageText,
+    answerCallbackQuery; остальные методы просто отвечают true.
+Задержка ответа, доля ошибок и ограничение частоты запросов задаются параметрами.
+
+Пример запуска из корня проекта:
+    python -m benchmarks.fake_services --port 8081 --latency 0.05 --error-rate 0.01 --rate-limit 30
+
+Бот направляется на заглушки переменными окружения:
+    WEATHERSTACK_BASE_URL=http://127.0.0.1:8081
+    CAT_FACTS_BASE_URL=http://127.0.0.1:8081
+    TELEGRAM_API_URL=http://127.0.0.1:8081
+
+Обновления для getUpdates добавляются запросом POST /_fake/updates (JSON-объект или список),
+счётчики вызовов доступны по GET /_fake/stats.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Каноническое название, страна, регион и варианты написания, которые вводят пользователи
+CITIES = [
+    ("Moscow", "Russia", "Moscow City", ["moscow", "москва"]),
+    ("Saint Petersburg", "Russia", "Saint Petersburg City", ["saint petersburg", "санкт-петербург", "питер"]),
+    ("Novosibirsk", "Russia", "Novosibirsk", ["novosibirsk", "новосибирск"]),
+    ("Yekaterinburg", "Russia", "Sverdlovsk", ["yekaterinburg", "екатеринбург"]),
+    ("Kazan", "Russia", "Tatarstan", ["kazan", "казань"]),
+    ("Sochi", "Russia", "Krasnodar", ["sochi", "сочи"]),
+    ("London", "United Kingdom", "City of London, Greater London", ["london", "лондон"]),
+    ("Paris", "France", "Ile-de-France", ["paris", "париж"]),
+    ("Berlin", "Germany", "Berlin", ["berlin", "берлин"]),
+    ("New York", "United States of America", "New York", ["new york", "нью-йорк"]),
+    ("Tokyo", "Japan", "Tokyo", ["tokyo", "токио"]),
+    ("Madrid", "Spain", "Madrid", ["madrid", "мадрид"]),
+    ("Rome", "Italy", "Lazio", ["rome", "рим"]),
+    ("Prague", "Czech Republic", "Prague", ["prague", "прага"]),
+    ("Istanbul", "Turkey", "Istanbul", ["istanbul", "стамбул"]),
+    ("Dubai", "United Arab Emirates", "Dubai", ["dubai", "дубай"]),
+]
+
+WIND_DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+DESCRIPTIONS = ["Sunny", "Partly cloudy", "Overcast", "Light rain", "Snow", "Mist"]
+
+
+class FakeServices:
+    def __init__(
+            self,
+            latency: float = 0.05,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            rate_limit: float = 0.0,
+            facts: int = 332,
+            seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+
+        self.facts = [
+            f"Cat fact #{index}: a cat sleeps about {12 + index % 5} hours a day and has {230 + index % 20} bones."
+            for index in range(1, facts + 1)
+        ]
+        self.cities: Dict[str, Tuple[str, str, str]] = {
+            alias: (name, country, region) for name, country, region, aliases in CITIES for alias in aliases
+        }
+
+        # Ограничение частоты — маркерное ведро на клиента: ключ -> (жетоны, время пополнения)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._updates: List[Dict] = []
+        self._next_update_id = 1
+        self._updates_event = asyncio.Event()
+        self._message_ids: Counter = Counter()
+
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/current", self.weatherstack_current)
+        app.router.add_get("/fact", self.cat_fact)
+        app.router.add_get("/facts", self.cat_facts)
+        app.router.add_route("*", "/bot{token}/{method}", self.bot_api)
+        app.router.add_post("/_fake/updates", self.add_updates)
+        app.router.add_get("/_fake/stats", self.get_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+        runner = web.AppRunner(self.build_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    def push_update(self, update: Dict) -> int:
+        update = dict(update, update_id=self._next_update_id)
+        self._next_update_id += 1
+        self._updates.append(update)
+        self._updates_event.set()
+        return update["update_id"]
+
+    def _allow(self, key: str) -> bool:
+        if self.rate_limit <= 0:
+            return True
+
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.rate_limit, now))
+        tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        return True
+
+    async def _simulate(self, name: str, client: str) -> Optional[str]:
+        """Задержка ответа и решение, что вернуть: None — нормальный ответ, иначе вид отказа."""
+        self.calls[name] += 1
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if not self._allow(f"{name}:{client}"):
+            self.rate_limited[name] += 1
+            return "rate_limited"
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors[name] += 1
+            return "error"
+        return None
+
+    async def weatherstack_current(self, request: web.Request) -> web.Response:
+        outcome = await self._simulate("weatherstack", request.query.get("access_key", ""))
+        if outcome == "rate_limited":
+            return web.json_response({
+                "success": False,
+                "error": {"code": 106, "type": "rate_limit_reached", "info": "Too many requests"}
+            })
+        if outcome == "error":
+            return web.json_response({"success": False}, status=500)
+
+        query = request.query.get("query", "")
+        city = self.cities.get(" ".join(query.split(",")[0].casefold().split()))
+        if city is None:
+            return web.json_response({
+                "success": False,
+                "error": {"code": 615, "type": "request_failed", "info": "Your API request failed."}
+            })
+
+        name, country, region = city
+        # Погода меняется раз в 10 минут и одинакова для всех вариантов написания города
+        state = random.Random(f"{name}:{int(time.time() // 600)}")
+        temperature = state.randint(-25, 35)
+        return web.json_response({
+            "request": {"type": "City", "query": f"{name}, {country}", "language": "en", "unit": "m"},
+            "location": {
+                "name": name, "country": country, "region": region,
+                "lat": "0.000", "lon": "0.000", "timezone_id": "UTC",
+                "localtime": time.strftime("%Y-%m-%d %H:%M"), "localtime_epoch": int(time.time()), "utc_offset": "0.0"
+            },
+            "current": {
+                "observation_time": time.strftime("%I:%M %p"),
+                "temperature": temperature,
+                "weather_code": 113,
+                "weather_icons": ["https://example.invalid/icon.png"],
+                "weather_descriptions": [state.choice(DESCRIPTIONS)],
+                "wind_speed": state.randint(0, 40),
+                "wind_degree": state.randint(0, 359),
+                "wind_dir": state.choice(WIND_DIRECTIONS),
+                "pressure": state.randint(980, 1040),
+                "precip": 0,
+                "humidity": state.randint(20, 100),
+                "cloudcover": state.randint(0, 100),
+                "feelslike": temperature - state.randint(0, 5),
+                "uv_index": state.randint(0, 9),
+                "visibility": state.randint(1, 10),
+                "is_day": "yes"
+            }
+        })
+
+    async def _cat_failure(self, request: web.Request) -> Optional[web.Response]:
+        outcome = await self._simulate("catfacts", request.remote or "")
+        if outcome == "rate_limited":
+            return web.json_response({"message": "Too Many Attempts."}, status=429)
+        if outcome == "error":
+            return web.json_response({"message": "Server Error"}, status=500)
+        return None
+
+    async def cat_fact(self, request: web.Request) -> web.Response:
+        failure = await self._cat_failure(request)
+        if failure is not None:
+            return failure
+
+        fact = self.rng.choice(self.facts)
+        return web.json_response({"fact": fact, "length": len(fact)})
+
+    async def cat_facts(self, request: web.Request) -> web.Response:
+        failure = await self._cat_failure(request)
+        if failure is not None:
+            return failure
+
+        limit = max(1, int(request.query.get("limit", 10)))
+        page = max(1, int(request.query.get("page", 1)))
+        last_page = max(1, -(-len(self.facts) // limit))
+        chunk = self.facts[(page - 1) * limit:page * limit]
+        return web.json_response({
+            "current_page": page,
+            "data": [{"fact": fact, "length": len(fact)} for fact in chunk],
+            "last_page": last_page,
+            "per_page": limit,
+            "total": len(self.facts)
+        })
+
+    async def bot_api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = dict(await request.post())
+        params.update(request.query)
+
+        outcome = await self._simulate(f"bot.{method}", request.match_info["token"])
+        if outcome == "rate_limited":
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}
+            }, status=429)
+        if outcome == "error":
+            return web.json_response({"ok": False, "error_code": 500, "description": "Internal Server Error"}, status=500)
+
+        if method == "getme":
+            result = self._bot_user()
+        elif method == "getupdates":
+            result = await self._get_updates(int(params.get("offset", 0)), float(params.get("timeout", 0)))
+        elif method == "sendmessage":
+            chat_id = int(params["chat_id"])
+            self._message_ids[chat_id] += 1
+            result = self._message(chat_id, self._message_ids[chat_id], params.get("text", ""))
+        elif method == "editmessagetext":
+            result = self._message(int(params["chat_id"]), int(params["message_id"]), params.get("text", ""))
+        else:
+            # answerCallbackQuery, deleteWebhook и прочие служебные методы
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, offset: int, timeout: float) -> List[Dict]:
+        if offset:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+
+        if not self._updates and timeout > 0:
+            self._updates_event.clear()
+            try:
+                await asyncio.wait_for(self._updates_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return self._updates[:100]
+
+    @staticmethod
+    def _bot_user() -> Dict:
+        return {"id": 1, "is_bot": True, "first_name": "Fake bot", "username": "fake_bot"}
+
+    def _message(self, chat_id: int, message_id: int, text: str) -> Dict:
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self._bot_user(),
+            "text": text
+        }
+
+    async def add_updates(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        updates = body if isinstance(body, list) else [body]
+        ids = [self.push_update(update) for update in updates]
+        return web.json_response({"ok": True, "update_ids": ids})
+
+    def stats(self) -> Dict:
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "rate_limited": dict(self.rate_limited),
+            "pending_updates": len(self._updates)
+        }
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Локальные заглушки Weatherstack, Cat Facts и Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа, секунд")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайный разброс задержки, секунд")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой сервера")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="запросов в секунду на клиента, 0 — без ограничения")
+    parser.add_argument("--facts", type=int, default=332, help="число фактов о котах")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    services = FakeServices(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        facts=args.facts,
+        seed=args.seed
+    )
+    runner = await services.start(args.host, args.port)
+    print(f"Заглушки запущены на http://{args.host}:{args.port}")
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(json.dumps(services.stats(), ensure_ascii=False))
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
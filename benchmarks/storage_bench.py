@@ -0,0 +1,228 @@
+"""
+Нагрузочный бенчмарк хранилища пользовательских данных.
+
+Заполняет хранилище синтетическими пользователями, замеряет перцентили задержки
+и пропускную способность всех публичных методов хранилища и сборки админских экранов,
+после чего сохраняет отчёт в JSON для сравнения между бэкендами и версиями.
+
+Пример запуска из корня проекта:
+    python -m benchmarks.storage_bench --backend json --users 1000 100000 --output bench_report.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from statistics import mean
+from typing import Awaitable, Callable, Dict, List
+from datetime import datetime, timedelta
+
+CITIES = [
+    "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Нижний Новгород",
+    "Челябинск", "Самара", "Омск", "Ростов-На-Дону", "Уфа", "Красноярск", "Воронеж", "Пермь",
+    "London", "Paris", "Berlin", "New York", "Tokyo", "Madrid", "Rome", "Prague", "Vienna",
+    "Istanbul", "Dubai", "Beijing", "Seoul", "Sydney", "Toronto", "Amsterdam"
+]
+
+
+def generate_dataset(users: int, favorites_per_user: float, ban_ratio: float, seed: int) -> Dict:
+    rng = random.Random(seed)
+    now = datetime.now()
+    # Популярность городов убывает по закону Ципфа, как у реальных избранных
+    weights = [1 / rank for rank in range(1, len(CITIES) + 1)]
+
+    data = {
+        "users": {},
+        "favorites": {},
+        "banned_users": {},
+        "statistics": {"total_users": users, "total_requests": 0, "bot_started": str(now)}
+    }
+
+    total_requests = 0
+    for user_id in range(1, users + 1):
+        first_seen = now - timedelta(seconds=rng.randint(0, 180 * 86400))
+        last_activity = first_seen + (now - first_seen) * rng.random()
+        request_count = rng.randint(1, 200)
+        total_requests += request_count
+
+        data["users"][str(user_id)] = {
+            "username": f"user{user_id}",
+            "first_seen": str(first_seen),
+            "last_activity": str(last_activity),
+            "request_count": request_count
+        }
+
+        count = min(len(CITIES), int(rng.expovariate(1 / favorites_per_user)) if favorites_per_user else 0)
+        if count:
+            cities = set()
+            while len(cities) < count:
+                cities.add(rng.choices(CITIES, weights)[0])
+            data["favorites"][str(user_id)] = sorted(cities)
+
+        if rng.random() < ban_ratio:
+            data["banned_users"][str(user_id)] = {
+                "reason": "benchmark",
+                "banned_at": str(last_activity),
+                "banned_by": 0
+            }
+
+    data["statistics"]["total_requests"] = total_requests
+    return data
+
+
+def create_storage(backend: str, workdir: Path, data: Dict):
+    from storage.json_storage import JSONStorage
+    from storage.sqlite_storage import SQLiteStorage
+
+    json_path = workdir / "user_data.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    if backend == "sqlite":
+        return SQLiteStorage(str(workdir / "user_data.db"), migrate_from=str(json_path))
+    return JSONStorage(str(json_path), journal=backend == "json-journal")
+
+
+def summarize(samples: List[float], elapsed: float) -> Dict:
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(mean(ordered) * 1000, 4),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else None
+    }
+
+
+async def measure(iterations: int, operation: Callable[[int], Awaitable]) -> Dict:
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        await operation(i)
+        samples.append(time.perf_counter() - op_started)
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def run_population(args, users: int) -> Dict:
+    data = generate_dataset(users, args.favorites, args.ban_ratio, args.seed)
+    rng = random.Random(args.seed + 1)
+    existing = lambda: rng.randint(1, users)
+
+    with tempfile.TemporaryDirectory(prefix="storage-bench-") as tmp:
+        workdir = Path(tmp)
+
+        load_started = time.perf_counter()
+        storage = create_storage(args.backend, workdir, data)
+        load_seconds = time.perf_counter() - load_started
+        del data
+
+        await storage.start()
+
+        from routers import admin
+
+        n, bulk = args.iterations, args.bulk_iterations
+        operations = {
+            "add_user": (n, lambda i: storage.add_user(users + 1 + i, f"new{i}")),
+            "update_user_activity": (n, lambda i: storage.update_user_activity(existing())),
+            "flush_activity": (bulk, lambda i: storage.flush_activity()),
+            "add_favorite": (n, lambda i: storage.add_favorite(existing(), rng.choice(CITIES))),
+            "remove_favorite": (n, lambda i: storage.remove_favorite(existing(), rng.choice(CITIES))),
+            "get_favorites": (n, lambda i: storage.get_favorites(existing())),
+            "get_user_info": (n, lambda i: storage.get_user_info(existing())),
+            "is_user_banned": (n, lambda i: storage.is_user_banned(existing())),
+            "get_ban_info": (n, lambda i: storage.get_ban_info(existing())),
+            "ban_user": (n, lambda i: storage.ban_user(existing(), "benchmark", 0)),
+            "unban_user": (n, lambda i: storage.unban_user(existing(), 0)),
+            "get_statistics": (n, lambda i: storage.get_statistics()),
+            "get_all_users": (bulk, lambda i: storage.get_all_users()),
+            "get_users": (bulk, lambda i: storage.get_users()),
+            "get_all_favorites": (bulk, lambda i: storage.get_all_favorites()),
+            "get_banned_users": (bulk, lambda i: storage.get_banned_users()),
+            "admin_panel": (n, lambda i: admin.build_admin_panel_text(storage)),
+            "admin_stats": (n, lambda i: admin.build_detailed_stats_text(storage)),
+            "admin_users": (n, lambda i: admin.build_users_overview_text(storage)),
+        }
+
+        results = {}
+        for name, (iterations, operation) in operations.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await measure(iterations, operation)
+            print(f"  {name:22} p50={results[name]['p50_ms']:>10} ms  p99={results[name]['p99_ms']:>10} ms")
+
+        close_started = time.perf_counter()
+        await storage.close()
+        close_seconds = time.perf_counter() - close_started
+
+        return {
+            "users": users,
+            "load_seconds": round(load_seconds, 3),
+            "close_seconds": round(close_seconds, 3),
+            "data_file_bytes": sum(path.stat().st_size for path in workdir.iterdir() if path.is_file()),
+            "operations": results,
+            "write_metrics": storage.get_write_metrics()
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища пользовательских данных")
+    parser.add_argument("--backend", choices=["json", "json-journal", "sqlite"], default="json")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--favorites", type=float, default=2.0, help="среднее число избранных городов на пользователя")
+    parser.add_argument("--ban-ratio", type=float, default=0.01, help="доля заблокированных пользователей")
+    parser.add_argument("--iterations", type=int, default=2000, help="повторов для точечных операций")
+    parser.add_argument("--bulk-iterations", type=int, default=5, help="повторов для операций над всеми данными")
+    parser.add_argument("--only", nargs="*", help="замерять только перечисленные операции")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="storage_bench_report.json")
+    args = parser.parse_args()
+
+    # Модуль админки читает настройки при импорте; данные бенчмарка при этом живут во временном каталоге
+    os.environ.setdefault("BOT_TOKEN", "benchmark")
+    project_root = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(project_root))
+    os.chdir(tempfile.mkdtemp(prefix="storage-bench-cwd-"))
+
+    report = {
+        "created_at": str(datetime.now()),
+        "backend": args.backend,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "parameters": {
+            "favorites": args.favorites,
+            "ban_ratio": args.ban_ratio,
+            "iterations": args.iterations,
+            "bulk_iterations": args.bulk_iterations,
+            "seed": args.seed
+        },
+        "populations": []
+    }
+
+    for users in args.users:
+        print(f"{args.backend}: {users} пользователей")
+        report["populations"].append(await run_population(args, users))
+
+    output = Path(args.output)
+    if not output.is_absolute():
+        output = project_root / output
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Отчёт сохранён в {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,322 @@
+"""
+Сквозной нагрузочный тест бота: синтетический поток обновлений через Dispatcher из bot.py.
+
+Виртуальные пользователи отправляют сообщения и нажатия кнопок (/start, ввод города, избранное,
+факты о котах, админские экраны) прямо в dp.feed_update со всеми настоящими middleware и роутерами.
+Внешние сервисы заменяются заглушками из benchmarks.fake_services, данные бота живут во временном каталоге.
+В отчёте — обновлений в секунду, перцентили задержки по шагам сценариев и по обработчикам,
+задержка event loop.
+
+Пример запуска из корня проекта:
+    python -m benchmarks.throughput_bench --users 200 --duration 30 --output throughput_report.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from benchmarks.fake_services import CITIES, FakeServices
+from benchmarks.storage_bench import summarize
+
+CITY_QUERIES = [alias for _, _, _, aliases in CITIES for alias in aliases]
+UNKNOWN_CITIES = ["Атлантида", "Xyzzyville", "Гдетотам", "Nowhere Town"]
+
+# Сценарий — последовательность шагов: (метка, тип обновления, текст или callback_data)
+Step = Tuple[str, str, str]
+
+SCENARIO_WEIGHTS = {
+    "start": 5,
+    "weather_input": 20,
+    "weather_command": 10,
+    "favorite_city": 20,
+    "add_favorite": 5,
+    "cat_fact": 25,
+    "back_to_main": 15,
+}
+
+ADMIN_SCREENS = ["admin_stats", "admin_users", "admin_cache", "back_to_admin"]
+
+
+def build_steps(scenario: str, rng: random.Random, unknown_ratio: float) -> List[Step]:
+    city = rng.choice(UNKNOWN_CITIES) if rng.random() < unknown_ratio else rng.choice(CITY_QUERIES)
+
+    if scenario == "start":
+        return [("start", "message", "/start")]
+    if scenario == "weather_input":
+        return [("weather_button", "callback", "weather"), ("city_input", "message", city)]
+    if scenario == "weather_command":
+        return [("weather_command", "message", "/weather"), ("city_input", "message", city)]
+    if scenario == "favorite_city":
+        return [("show_favorites", "callback", "show_favorites"), ("favorite_city", "callback", f"city_{city}")]
+    if scenario == "add_favorite":
+        return [("add_favorite_button", "callback", "add_favorite"), ("add_favorite_city", "message", city)]
+    if scenario == "cat_fact":
+        return [("cat_command", "message", "/cat")] if rng.random() < 0.5 else [("cat_button", "callback", "cat_fact")]
+    if scenario == "back_to_main":
+        return [("back_to_main", "callback", "back_to_main")]
+    if scenario == "admin":
+        return [("admin_command", "message", "/admin")] + [
+            (screen, "callback", screen) for screen in rng.sample(ADMIN_SCREENS, 2)
+        ]
+    raise ValueError(f"Неизвестный сценарий: {scenario}")
+
+
+class UpdateFactory:
+    def __init__(self):
+        self.update_id = 0
+        self.callback_id = 0
+
+    @staticmethod
+    def _user(user_id: int) -> Dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+    def message(self, user_id: int, message_id: int, text: str) -> Dict:
+        self.update_id += 1
+        return {
+            "update_id": self.update_id,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text
+            }
+        }
+
+    def callback(self, user_id: int, message_id: int, data: str) -> Dict:
+        self.update_id += 1
+        self.callback_id += 1
+        return {
+            "update_id": self.update_id,
+            "callback_query": {
+                "id": str(self.callback_id),
+                "from": self._user(user_id),
+                "chat_instance": "benchmark",
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {"id": 1, "is_bot": True, "first_name": "Fake bot"},
+                    "text": "🏠 Главное меню"
+                }
+            }
+        }
+
+
+class HandlerTimer(BaseMiddleware):
+    """Внутренний middleware: время работы каждого обработчика без учёта диспетчеризации."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_object = data.get("handler")
+            name = handler_object.callback.__name__ if handler_object else "unknown"
+            self.samples[name].append(time.perf_counter() - started)
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+async def run_user(
+        user_id: int,
+        is_admin: bool,
+        deadline: float,
+        args,
+        bot,
+        dp,
+        factory: UpdateFactory,
+        step_samples: Dict[str, List[float]],
+        errors: Counter
+):
+    rng = random.Random(args.seed * 100003 + user_id)
+    scenarios = list(SCENARIO_WEIGHTS) + (["admin"] if is_admin else [])
+    weights = list(SCENARIO_WEIGHTS.values()) + ([args.admin_weight] if is_admin else [])
+    message_id = 0
+
+    # Пользователи подключаются вразнобой, чтобы не было синхронных волн запросов
+    await asyncio.sleep(rng.uniform(0, args.think_time))
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        for label, kind, payload in build_steps(scenario, rng, args.unknown_city_ratio):
+            message_id += 1
+            if kind == "message":
+                raw = factory.message(user_id, message_id, payload)
+            else:
+                raw = factory.callback(user_id, message_id, payload)
+            update = Update.model_validate(raw, context={"bot": bot})
+
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception as e:
+                errors[f"{label}: {type(e).__name__}"] += 1
+            step_samples[label].append(time.perf_counter() - started)
+
+            await asyncio.sleep(args.think_time * rng.uniform(0.5, 1.5))
+            if time.perf_counter() >= deadline:
+                return
+
+
+def prepare_environment(fake_url: str):
+    # Настройки читаются при импорте модулей бота, поэтому окружение готовится заранее
+    os.environ.setdefault("BOT_TOKEN", "123456:benchmark")
+    os.environ.setdefault("WEATHER_API_KEY", "benchmark")
+    os.environ["WEATHERSTACK_BASE_URL"] = fake_url
+    os.environ["CAT_FACTS_BASE_URL"] = fake_url
+    os.environ["TELEGRAM_API_URL"] = fake_url
+
+    project_root = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(project_root))
+    os.chdir(tempfile.mkdtemp(prefix="throughput-bench-cwd-"))
+
+
+async def run(args) -> Dict:
+    fake_runner = None
+    fake_services: Optional[FakeServices] = None
+    fake_url = args.fake_url
+    if not fake_url:
+        fake_services = FakeServices(latency=args.fake_latency, error_rate=args.fake_error_rate, seed=args.seed)
+        fake_runner = await fake_services.start("127.0.0.1", args.fake_port)
+        fake_url = f"http://127.0.0.1:{args.fake_port}"
+
+    prepare_environment(fake_url)
+
+    import bot as bot_module
+    from config.settings import ADMIN_IDS
+
+    admin_ids = [900000000 + i for i in range(args.admins)]
+    # Виртуальные админы добавляются к настоящим только в памяти этого процесса
+    ADMIN_IDS.update(admin_ids)
+
+    bot = bot_module.create_bot()
+    dp = bot_module.create_dispatcher()
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+    await bot_module.start_services()
+
+    # Пул фактов о котах заполняется в фоне; даём ему начать работу до старта нагрузки
+    await asyncio.sleep(args.warmup)
+
+    factory = UpdateFactory()
+    step_samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    lag_samples: List[float] = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples))
+
+    user_ids = admin_ids + [1000 + i for i in range(args.users - len(admin_ids))]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        run_user(user_id, user_id in admin_ids, deadline, args, bot, dp, factory, step_samples, errors)
+        for user_id in user_ids
+    ))
+    elapsed = time.perf_counter() - started
+
+    lag_task.cancel()
+    try:
+        await lag_task
+    except asyncio.CancelledError:
+        pass
+
+    await bot_module.stop_services()
+    await bot.session.close()
+    if fake_runner is not None:
+        await fake_runner.cleanup()
+
+    total_updates = sum(len(samples) for samples in step_samples.values())
+    return {
+        "updates": total_updates,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(total_updates / elapsed, 1) if elapsed else None,
+        "handled": sum(len(samples) for samples in timer.samples.values()),
+        "errors": dict(errors),
+        "steps": {label: summarize(samples, elapsed) for label, samples in sorted(step_samples.items())},
+        "handlers": {name: summarize(samples, elapsed) for name, samples in sorted(timer.samples.items())},
+        "loop_lag": summarize(lag_samples, elapsed) if lag_samples else None,
+        "fake_services": fake_services.stats() if fake_services else None
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный тест бота через Dispatcher")
+    parser.add_argument("--users", type=int, default=100, help="одновременных виртуальных пользователей")
+    parser.add_argument("--admins", type=int, default=2, help="сколько из них администраторы")
+    parser.add_argument("--admin-weight", type=float, default=10, help="вес админских сценариев у администраторов")
+    parser.add_argument("--duration", type=float, default=30, help="длительность нагрузки, секунд")
+    parser.add_argument("--warmup", type=float, default=1, help="пауза после запуска сервисов, секунд")
+    parser.add_argument("--think-time", type=float, default=1.0, help="средняя пауза пользователя между действиями")
+    parser.add_argument("--unknown-city-ratio", type=float, default=0.1, help="доля запросов несуществующих городов")
+    parser.add_argument("--fake-url", help="адрес уже запущенных заглушек; по умолчанию они поднимаются в этом процессе")
+    parser.add_argument("--fake-port", type=int, default=8082)
+    parser.add_argument("--fake-latency", type=float, default=0.05)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="throughput_bench_report.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()))
+    project_root = Path(__file__).resolve().parent.parent
+
+    result = await run(args)
+
+    print(f"Обновлений: {result['updates']} за {result['seconds']} с — {result['updates_per_sec']} в секунду")
+    for name, stats in result["handlers"].items():
+        print(f"  {name:32} n={stats['count']:>7}  p50={stats['p50_ms']:>9} ms  p99={stats['p99_ms']:>9} ms")
+    if result["loop_lag"]:
+        print(f"Задержка event loop: p50={result['loop_lag']['p50_ms']} ms, p99={result['loop_lag']['p99_ms']} ms, "
+              f"max={result['loop_lag']['max_ms']} ms")
+    if result["errors"]:
+        print(f"Ошибки: {result['errors']}")
+
+    report = {
+        "created_at": str(datetime.now()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "log_level")
+        },
+        "result": result
+    }
+
+    output = Path(args.output)
+    if not output.is_absolute():
+        output = project_root / output
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Отчёт сохранён в {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,13 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config.settings import BOT_TOKEN
+from config.settings import (
+    BOT_TOKEN, TELEGRAM_API_URL, HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL
+)
 from middleware.ban_check import BanCheckMiddleware
 from routers import weather, favorites
 from routers import commands
@@ -11,25 +15,58 @@ from routers.cat_facts import router as cat_router
 from middleware.throttling import ThrottlingMiddleware
 from utils.logger import setup_logger
 from routers.admin import router as admin_router
+from storage.shared import get_storage
+from services.http_session import create_session, close_session
+from services.shared import start_api_clients, close_api_clients
 
 
-async def main():
-    setup_logger()
+def create_bot() -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+    return Bot(token=BOT_TOKEN, session=session)
 
-    bot = Bot(token=BOT_TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
 
-    dp.message.middleware(BanCheckMiddleware())
-    dp.callback_query.middleware(BanCheckMiddleware())
-    dp.message.middleware(ThrottlingMiddleware())
-    dp.callback_query.middleware(ThrottlingMiddleware())
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=MemoryStorage())
+
+    ban_check = BanCheckMiddleware()
+    dp.message.middleware(ban_check)
+    dp.callback_query.middleware(ban_check)
+    throttling = ThrottlingMiddleware()
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
 
     dp.include_router(weather.router)
     dp.include_router(favorites.router)
     dp.include_router(cat_router)
     dp.include_router(admin_router)
     dp.include_router(commands.router)
+    return dp
+
+
+async def start_services():
+    await get_storage().start()
+
+    await create_session(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl=HTTP_DNS_CACHE_TTL
+    )
+    await start_api_clients()
+
+
+async def stop_services():
+    await close_api_clients()
+    await close_session()
+    await get_storage().close()
+
+
+async def main():
+    setup_logger()
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    await start_services()
 
     logging.info("Бот запущен и готов к работе!")
 
@@ -40,6 +77,7 @@ async def main():
     except Exception as e:
         logging.error(f"Критическая ошибка: {e}")
     finally:
+        await stop_services()
         await bot.session.close()
 
 
@@ -5,11 +5,66 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 WEATHERSTACK_API_KEY = os.getenv("WEATHER_API_KEY")
+WEATHERSTACK_BASE_URL = os.getenv("WEATHERSTACK_BASE_URL", "http://api.weatherstack.com")
+CAT_FACTS_BASE_URL = os.getenv("CAT_FACTS_BASE_URL", "https://catfact.ninja")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")  # свой сервер Bot API, например python -m benchmarks.fake_services
 
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN not found in environment variables")
 
 CACHE_TTL = 300  # 5 минут
+WEATHER_STALE_TTL = 3600  # секунд после CACHE_TTL, в течение которых отдаём устаревшую погоду и обновляем её в фоне
+WEATHER_CACHE_MAX_ENTRIES = 5000  # городов в кэше погоды
+WEATHER_CACHE_MAX_BYTES = 16 * 1024 * 1024  # предельный объём кэша погоды
+WEATHER_CACHE_PERSIST = os.getenv("WEATHER_CACHE_PERSIST", "1") == "1"  # сохранять кэш погоды между перезапусками
+WEATHER_CACHE_DB = "storage/weather_cache.db"
+CITY_ALIASES_FILE = "storage/city_aliases.json"  # соответствие запросов каноническим городам
+WEATHER_NOT_FOUND_TTL = 600  # секунд помним, что город не найден (ошибка 615)
+WEATHER_ERROR_TTL = 30  # секунд не повторяем запрос после таймаута или ошибки API
+WEATHER_MONTHLY_QUOTA = int(os.getenv("WEATHER_MONTHLY_QUOTA", "10000"))  # запросов к Weatherstack в месяц по тарифу
+WEATHER_QUOTA_FILE = "storage/weather_quota.json"
+WEATHER_QUOTA_MAX_TTL_FACTOR = 6  # во сколько раз максимум удлиняем кэш при угрозе превышения квоты
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"  # фоново обновлять погоду популярных городов
+PREFETCH_TOP_N = 20  # сколько самых популярных городов держать в кэше
+PREFETCH_HOURLY_BUDGET = 100  # максимум фоновых запросов к Weatherstack в час
+PREFETCH_INTERVAL = 60  # секунд между проходами
+PREFETCH_REFRESH_MARGIN = 60  # обновлять за столько секунд до истечения CACHE_TTL
+CAT_FACT_CACHE_TTL = 60
+CAT_FACT_POOL_FILE = "storage/cat_facts.json"
+CAT_FACT_POOL_SIZE = 500  # фактов о котах в локальном запасе
+CAT_FACT_PAGE_SIZE = 100  # фактов за один запрос к /facts
+CAT_FACT_POOL_REFRESH_INTERVAL = 6 * 3600  # секунд между пополнениями запаса
+CAT_FACT_SEEN_MAX_USERS = 100000  # пользователей, для которых помним показанные факты
+CACHE_SWEEP_INTERVAL = 60  # секунд между очистками просроченных записей
+
+HTTP_POOL_LIMIT = 100  # всего открытых соединений к внешним API
+HTTP_POOL_LIMIT_PER_HOST = 20  # соединений к одному хосту
+HTTP_KEEPALIVE_TIMEOUT = 30  # секунд держим простаивающее соединение
+HTTP_DNS_CACHE_TTL = 300  # секунд кэшируем DNS ответы
+
+UPSTREAM_FAILURE_THRESHOLD = 5  # подряд неудачных или медленных ответов до размыкания предохранителя
+UPSTREAM_RECOVERY_TIMEOUT = 30  # секунд до пробного запроса к недоступному API
+UPSTREAM_MIN_TIMEOUT = 1  # нижняя граница адаптивного таймаута
+WEATHER_MAX_TIMEOUT = 10  # верхняя граница таймаута Weatherstack
+CAT_FACTS_MAX_TIMEOUT = 5  # верхняя граница таймаута Cat Facts
+
+THROTTLE_RATE = 1.0  # жетонов в секунду на пользователя; обычный обработчик стоит 1, дорогие — больше (флаг cost)
+THROTTLE_BURST = 6  # запас жетонов: пара запросов погоды или несколько обычных действий подряд
+THROTTLE_DEFAULT_COST = 1  # стоимость обработчика без флага cost
+THROTTLE_UPSTREAM_RATE = 20  # общий на всех бюджет вызовов Weatherstack в секунду; кэш его не расходует
+THROTTLE_UPSTREAM_BURST = 60
+THROTTLE_MAX_USERS = 100000  # предел числа вёдер в памяти
+THROTTLE_SWEEP_INTERVAL = 60  # секунд между удалениями простаивающих вёдер
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")  # json или sqlite
+STORAGE_FILE = "storage/user_data.json"
+SQLITE_DB_FILE = "storage/user_data.db"
+STORAGE_FLUSH_INTERVAL = 5  # секунд между сбросами данных на диск
+STORAGE_JOURNAL = os.getenv("STORAGE_JOURNAL", "1") == "1"  # журнал изменений вместо полной перезаписи
+STORAGE_JOURNAL_MAX_BYTES = 1024 * 1024  # размер журнала, после которого переписывается снимок
+STORAGE_SNAPSHOT_INTERVAL = 600  # секунд между снимками при непустом журнале
+ACTIVITY_FLUSH_INTERVAL = 10  # секунд между записями накопленной активности
+ACTIVITY_FLUSH_EVENTS = 500  # событий активности, после которых запись выполняется сразу
 
 LOG_LEVEL = "INFO"
 LOG_FILE = "bot.log"
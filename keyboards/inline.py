@@ -1,3 +1,5 @@
+from typing import List
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 def get_main_menu() -> InlineKeyboardMarkup:
@@ -44,8 +46,15 @@ def get_admin_confirm_keyboard(action: str) -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
-def get_admin_cache_keyboard() -> InlineKeyboardMarkup:
+def get_admin_cache_keyboard(cache_names: List[str] = ()) -> InlineKeyboardMarkup:
     keyboard = [
+        [
+            InlineKeyboardButton(text=f"🗑 {name}", callback_data=f"cache_clear:{name}"),
+            InlineKeyboardButton(text=f"➗ {name}", callback_data=f"cache_shrink:{name}")
+        ]
+        for name in cache_names
+    ]
+    keyboard += [
         [InlineKeyboardButton(text="🗑 Очистить кэш", callback_data="clear_cache")],
         [InlineKeyboardButton(text="🔄 Обновить информацию", callback_data="admin_cache")],
         [InlineKeyboardButton(text="⬅ Назад к админке", callback_data="back_to_admin")]
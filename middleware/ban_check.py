@@ -1,7 +1,7 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
-from storage.json_storage import JSONStorage
+from storage.shared import get_storage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 class BanCheckMiddleware(BaseMiddleware):
     def __init__(self):
-        self.storage = JSONStorage()
+        self.storage = get_storage()
 
     async def __call__(
             self,
@@ -20,10 +20,8 @@ class BanCheckMiddleware(BaseMiddleware):
         if isinstance(event, (Message, CallbackQuery)):
             user_id = event.from_user.id
 
-            is_banned = await self.storage.is_user_banned(user_id)
-
-            if is_banned:
-                ban_info = await self.storage.get_ban_info(user_id)
+            if self.storage.is_banned(user_id):
+                ban_info = await self.storage.get_ban_info(user_id) or {}
 
                 ban_message = f"""
 🚫 **Вы заблокированы**
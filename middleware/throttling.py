@@ -1,13 +1,37 @@
-from typing import Callable, Dict, Any, Awaitable, Union
+import logging
+from typing import Callable, Dict, Any, Awaitable, Set
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject, Message, CallbackQuery
-import time
+
+from config.settings import THROTTLE_DEFAULT_COST
+from services.shared import get_rate_limiter
+
+logger = logging.getLogger(__name__)
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, rate_limit: float = 1.0):
-        self.rate_limit = rate_limit
-        self.user_last_message = {}
+    """Один экземпляр регистрируется и для сообщений, и для кнопок: у пользователя общее ведро на все обновления.
+
+    Обработчик объявляет свою стоимость флагом: flags={"cost": 3}. Навигация с cost 0 не ограничивается.
+    """
+
+    def __init__(self, default_cost: float = THROTTLE_DEFAULT_COST):
+        self.default_cost = default_cost
+        self.limiter = get_rate_limiter()
+        self._oversized: Set[str] = set()
+
+    def _handler_cost(self, data: Dict[str, Any]) -> float:
+        cost = get_flag(data, "cost", default=self.default_cost)
+        if cost > self.limiter.burst:
+            # Ведро не вмещает больше burst жетонов: такой обработчик был бы недоступен всегда
+            handler = data["handler"].callback.__name__
+            if handler not in self._oversized:
+                self._oversized.add(handler)
+                logger.warning(f"Стоимость обработчика {handler} ({cost}) больше запаса жетонов "
+                               f"({self.limiter.burst}), списывается {self.limiter.burst}")
+            cost = self.limiter.burst
+        return cost
 
     async def __call__(
             self,
@@ -15,19 +39,20 @@ class ThrottlingMiddleware(BaseMiddleware):
             event: TelegramObject,
             data: Dict[str, Any]
     ) -> Any:
-        user_id = None
-        if isinstance(event, (Message, CallbackQuery)):
-            user_id = event.from_user.id
-            current_time = time.time()
-
-            if user_id in self.user_last_message:
-                if current_time - self.user_last_message[user_id] < self.rate_limit:
-                    if isinstance(event, Message):
-                        await event.answer("⏳ Слишком много запросов! Подождите немного.")
-                    elif isinstance(event, CallbackQuery):
-                        await event.answer("⏳ Слишком много запросов!", show_alert=True)
-                    return
-
-            self.user_last_message[user_id] = current_time
-
-        return await handler(event, data)
\ No newline at end of file
+        cost = self._handler_cost(data)
+        if cost <= 0 or not isinstance(event, (Message, CallbackQuery)):
+            return await handler(event, data)
+
+        user_id = event.from_user.id
+        if not self.limiter.consume(user_id, cost):
+            if self.limiter.should_warn(user_id):
+                if isinstance(event, Message):
+                    await event.answer("⏳ Слишком много запросов! Подождите немного.")
+                else:
+                    await event.answer("⏳ Слишком много запросов!", show_alert=True)
+            elif isinstance(event, CallbackQuery):
+                # Кнопку всё равно нужно подтвердить, иначе у пользователя крутится индикатор загрузки
+                await event.answer()
+            return
+
+        return await handler(event, data)
@@ -5,37 +5,30 @@ from aiogram.fsm.context import FSMContext
 import logging
 import asyncio
 from datetime import datetime, timedelta
+from typing import Dict
 
 from config.settings import ADMIN_IDS
 from filters.admin_filter import AdminFilter
 from keyboards.inline import get_main_menu, get_admin_menu, get_admin_confirm_keyboard, get_admin_ban_keyboard, get_admin_cache_keyboard
-from storage.json_storage import JSONStorage
+from storage.base import BaseStorage
+from storage.shared import get_storage
 from states import AdminStates
-from services.api_client import WeatherstackAPI, CatFactsAPI
+from services.cache import get_cache_registry
+from services.cat_fact_pool import CatFactPool
+from services.circuit_breaker import CircuitBreaker
+from services.rate_limiter import TokenBucketLimiter
+from services.shared import (
+    get_weather_api, get_cat_api, get_cat_fact_pool, get_prefetcher, get_rate_limiter, get_upstream_limiter
+)
 
 router = Router()
-storage = JSONStorage()
+storage = get_storage()
 logger = logging.getLogger(__name__)
 
 
 @router.message(Command("admin"), AdminFilter(ADMIN_IDS))
 async def admin_command(message: Message):
-    stats = await storage.get_statistics()
-    all_users = await storage.get_all_users()
-    banned_users = await storage.get_banned_users()
-
-    admin_text = f"""
-🔧 **Админ панель**
-
-📊 **Статистика:**
-👥 Всего пользователей: {stats.get('total_users', 0)}
-✅ Активных: {len(all_users) - len(banned_users)}
-🚫 Заблокированных: {len(banned_users)}
-📈 Всего запросов: {stats.get('total_requests', 0)}
-🚀 Бот запущен: {stats.get('bot_started', 'Неизвестно')[:16]}
-
-🕐 **Текущее время:** {datetime.now().strftime('%d.%m.%Y %H:%M')}
-"""
+    admin_text = await build_admin_panel_text(storage)
 
     await message.answer(admin_text, reply_markup=get_admin_menu(), parse_mode="Markdown")
     logger.info(f"Админ {message.from_user.id} открыл админ панель")
@@ -47,70 +40,7 @@ async def admin_stats_callback(callback: CallbackQuery):
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    stats = await storage.get_statistics()
-
-    data = await storage.load_data()
-    users_data = data.get("users", {})
-    banned_users = data.get("banned_users", {})
-    total_favorites = sum(len(favs) for favs in data.get("favorites", {}).values())
-
-    now = datetime.now()
-    yesterday = now - timedelta(days=1)
-    active_today = 0
-
-    for user_id, user_info in users_data.items():
-        try:
-            last_activity = datetime.fromisoformat(user_info.get('last_activity', '2020-01-01 00:00:00'))
-            if last_activity > yesterday:
-                active_today += 1
-        except:
-            pass
-
-    city_counts = {}
-    for user_favs in data.get("favorites", {}).values():
-        for city in user_favs:
-            city_counts[city] = city_counts.get(city, 0) + 1
-
-    top_cities = sorted(city_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_cities_text = "\n".join([f"• {city}: {count}" for city, count in top_cities])
-
-    users_by_registration = []
-    for user_id, user_info in users_data.items():
-        try:
-            first_seen = datetime.fromisoformat(user_info.get('first_seen', '2020-01-01 00:00:00'))
-            users_by_registration.append((user_id, user_info, first_seen))
-        except:
-            users_by_registration.append((user_id, user_info, datetime(2020, 1, 1)))
-
-    users_by_registration.sort(key=lambda x: x[2], reverse=True)
-    recent_users = users_by_registration[:10]
-
-    recent_users_text = []
-    for user_id, user_info, _ in recent_users:
-        username = user_info.get('username', 'Не указан')
-        status = "🚫" if user_id in banned_users else "✅"
-        recent_users_text.append(f"{status} {user_id} (@{username})")
-
-    detailed_stats = f"""
-📊 **Детальная статистика**
-
-👥 **Пользователи:**
-• Всего: {stats.get('total_users', 0)}
-• Активных за сутки: {active_today}
-• Заблокированных: {len(banned_users)}
-
-📈 **Активность:**
-• Всего запросов: {stats.get('total_requests', 0)}
-• Избранных городов: {total_favorites}
-
-🏆 **Топ городов:**
-{top_cities_text if top_cities_text else "Нет данных"}
-
-📱 **Последние 10 пользователей:**
-{chr(10).join(recent_users_text) if recent_users_text else "Нет данных"}
-
-🚀 **Запуск:** {stats.get('bot_started', 'Неизвестно')[:16]}
-"""
+    detailed_stats = await build_detailed_stats_text(storage)
 
     await callback.message.edit_text(
         detailed_stats,
@@ -165,7 +95,7 @@ async def process_broadcast_message(message: Message, state: FSMContext):
     await state.update_data(broadcast_text=broadcast_text)
 
 
-@router.callback_query(F.data == "confirm_broadcast")
+@router.callback_query(F.data == "confirm_broadcast", flags={"cost": 5})
 async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
     if callback.from_user.id not in ADMIN_IDS:
         await callback.answer("❌ Нет доступа", show_alert=True)
@@ -247,25 +177,75 @@ async def admin_cache_callback(callback: CallbackQuery):
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    from config.settings import WEATHERSTACK_API_KEY
-    weather_api = WeatherstackAPI(WEATHERSTACK_API_KEY) if WEATHERSTACK_API_KEY else None
-    cat_api = CatFactsAPI()
+    weather_api = get_weather_api()
+    cat_api = get_cat_api()
+    registry = get_cache_registry()
+    cache_report = registry.report()
+    store_report = registry.store_report()
+
+    weather_text = "Сервис не настроен"
+    if weather_api:
+        weather_text = (
+            f"Объединено одновременных запросов: {weather_api.coalesced_requests}"
+            f"\nОтдано устаревших данных: {weather_api.stale_served}"
+            f"\nИзвестных вариантов названий городов: {len(weather_api.city_index)}"
+            f"\nПопаданий в негативный кэш «не найден»: {weather_api.negative_hits['not_found']}, "
+            f"«ошибка API»: {weather_api.negative_hits['error']}"
+        )
+
+    prefetcher = get_prefetcher()
+    if prefetcher:
+        prefetch_stats = prefetcher.stats()
+        weather_text += (
+            f"\nФоновых обновлений: {prefetch_stats['refreshed']} "
+            f"(за час {prefetch_stats['calls_last_hour']} из {prefetch_stats['hourly_budget']})"
+        )
+        if prefetch_stats['paused']:
+            weather_text += " — приостановлены из-за квоты"
+
+    if weather_api and weather_api.quota:
+        quota_stats = weather_api.quota.stats()
+        weather_text += (
+            f"\n\n📊 **Квота Weatherstack:** {quota_stats['month_calls']} из {quota_stats['monthly_quota']} за месяц, "
+            f"сегодня {quota_stats['today_calls']}\n"
+            f"Прогноз на конец месяца: {quota_stats['projected_month_calls']}"
+        )
+        if quota_stats['exhausted']:
+            weather_text += f"\n⛔ Квота исчерпана, отклонено запросов: {quota_stats['rejected']}"
+        elif quota_stats['over_budget']:
+            weather_text += f"\n⚠️ Режим экономии: кэш продлён в {quota_stats['ttl_factor']} раза"
 
     cache_info = f"""
 🔧 **Управление кэшем**
 
-🌤 **Weather API кэш:**
-Записей: {len(weather_api.cache) if weather_api else 0}
+🌤 **Weather API:**
+{weather_text}
+
+🐱 **Cat Facts:**
+{_format_cat_pool_stats(get_cat_fact_pool())}
+
+🔌 **Внешние API:**
+{_format_breaker_stats(weather_api.breaker) if weather_api else "Weatherstack: не настроен"}
+{_format_breaker_stats(cat_api.breaker)}
 
-🐱 **Cat Facts кэш:**
-Записей: {len(cat_api.cache)}
+🚦 **Ограничение частоты:**
+{_format_limiter_stats(get_rate_limiter())}
+Общий бюджет вызовов Weatherstack: {_format_upstream_stats(get_upstream_limiter())}
 
-💾 **Общий размер кэша:** ~{_calculate_cache_size(weather_api, cat_api)} KB
+🗂 **Кэши:**
+{chr(10).join(_format_cache_stats(stats) for stats in cache_report)}
+
+🧾 **Производные хранилища:**
+{chr(10).join(_format_store_stats(stats) for stats in store_report)}
+
+💾 **Общий размер кэша в памяти:** ~{round(sum(stats['deep_bytes'] for stats in cache_report) / 1024, 2)} KB
+
+🗑 — очистить кэш, ➗ — вдвое уменьшить его лимит записей; «Очистить кэш» очищает и производные хранилища
 """
 
     await callback.message.edit_text(
         cache_info,
-        reply_markup=get_admin_cache_keyboard(),
+        reply_markup=get_admin_cache_keyboard([stats['name'] for stats in cache_report]),
         parse_mode="Markdown"
     )
 
@@ -276,19 +256,14 @@ async def clear_cache_callback(callback: CallbackQuery):
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    from config.settings import WEATHERSTACK_API_KEY
-    weather_api = WeatherstackAPI(WEATHERSTACK_API_KEY) if WEATHERSTACK_API_KEY else None
-    cat_api = CatFactsAPI()
-
-    if weather_api:
-        weather_api.cache.clear()
-    cat_api.cache.clear()
+    get_cache_registry().clear_all()
 
     await callback.answer("✅ Кэш очищен!", show_alert=True)
 
     await callback.message.edit_text(
         "✅ **Кэш успешно очищен!**\n\n"
-        "Все кэшированные данные удалены.\n"
+        "Удалены кэши в памяти, дисковый кэш погоды, индекс названий городов, "
+        "история показов фактов и счётчики ограничения частоты.\n"
         "Следующие запросы будут обращаться к API.",
         reply_markup=get_admin_menu(),
         parse_mode="Markdown"
@@ -297,7 +272,36 @@ async def clear_cache_callback(callback: CallbackQuery):
     logger.info(f"Админ {callback.from_user.id} очистил кэш")
 
 
-@router.callback_query(F.data == "cancel_broadcast")
+@router.callback_query(F.data.startswith("cache_clear:") | F.data.startswith("cache_shrink:"))
+async def manage_single_cache_callback(callback: CallbackQuery):
+    if callback.from_user.id not in ADMIN_IDS:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+
+    action, name = callback.data.split(":", 1)
+    cache = get_cache_registry().get(name)
+    if cache is None:
+        await callback.answer("❌ Кэш не найден", show_alert=True)
+        return
+
+    if action == "cache_clear":
+        changed = len(cache) > 0
+        cache.clear()
+        await callback.answer(f"✅ Кэш {name} очищен")
+        logger.info(f"Админ {callback.from_user.id} очистил кэш {name}")
+    else:
+        limit = cache.max_entries
+        removed = cache.resize(limit // 2)
+        changed = removed > 0 or cache.max_entries != limit
+        await callback.answer(f"✅ Лимит {name}: {cache.max_entries} записей, вытеснено {removed}")
+        logger.info(f"Админ {callback.from_user.id} уменьшил лимит кэша {name} до {cache.max_entries}")
+
+    # Telegram отклоняет редактирование сообщения без изменений
+    if changed:
+        await admin_cache_callback(callback)
+
+
+@router.callback_query(F.data == "cancel_broadcast", flags={"cost": 0})
 async def cancel_broadcast(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text(
@@ -313,57 +317,7 @@ async def admin_users_callback(callback: CallbackQuery):
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    data = await storage.load_data()
-    users_data = data.get("users", {})
-    banned_users = data.get("banned_users", {})
-
-    now = datetime.now()
-    yesterday = now - timedelta(days=1)
-    week_ago = now - timedelta(days=7)
-
-    active_today = 0
-    active_week = 0
-
-    users_by_activity = []
-    for user_id, user_info in users_data.items():
-        try:
-            last_activity = datetime.fromisoformat(user_info.get('last_activity', '2020-01-01 00:00:00'))
-            users_by_activity.append((user_id, user_info, last_activity))
-
-            if last_activity > yesterday:
-                active_today += 1
-            if last_activity > week_ago:
-                active_week += 1
-        except:
-            users_by_activity.append((user_id, user_info, datetime(2020, 1, 1)))
-
-    users_by_activity.sort(key=lambda x: x[2], reverse=True)
-
-    top_users = users_by_activity[:10]
-    users_list = []
-
-    for user_id, user_info, last_activity in top_users:
-        username = user_info.get('username', 'Не указан')
-        status = "🚫 Заблокирован" if user_id in banned_users else "✅ Активен"
-        activity_str = last_activity.strftime('%d.%m %H:%M') if last_activity.year > 2020 else "Давно"
-        request_count = user_info.get('request_count', 0)
-
-        users_list.append(f"• {user_id} (@{username})\n  {status} | {request_count} запросов | {activity_str}")
-
-    users_text = f"""
-👥 **Управление пользователями**
-
-📊 **Статистика:**
-• Всего пользователей: {len(users_data)}
-• Активных за сутки: {active_today}
-• Активных за неделю: {active_week}
-• Заблокированных: {len(banned_users)}
-
-📱 **Топ-10 активных пользователей:**
-{chr(10).join(users_list) if users_list else "Нет данных"}
-
-ℹ️ *Пользователи сортированы по последней активности*
-"""
+    users_text = await build_users_overview_text(storage)
 
     await callback.message.edit_text(
         users_text,
@@ -636,45 +590,171 @@ async def process_unban_user_id(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data == "back_to_admin")
+@router.callback_query(F.data == "back_to_admin", flags={"cost": 0})
 async def back_to_admin_callback(callback: CallbackQuery):
     if callback.from_user.id not in ADMIN_IDS:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    stats = await storage.get_statistics()
-    all_users = await storage.get_all_users()
-    banned_users = await storage.get_banned_users()
+    admin_text = await build_admin_panel_text(storage)
+
+    await callback.message.edit_text(admin_text, reply_markup=get_admin_menu(), parse_mode="Markdown")
+
+
+async def build_admin_panel_text(user_storage: BaseStorage) -> str:
+    stats = await user_storage.get_statistics()
+    banned_count = user_storage.banned_count
 
     admin_text = f"""
 🔧 **Админ панель**
 
 📊 **Статистика:**
 👥 Всего пользователей: {stats.get('total_users', 0)}
-✅ Активных: {len(all_users) - len(banned_users)}
-🚫 Заблокированных: {len(banned_users)}
+✅ Активных: {user_storage.aggregates.user_count - banned_count}
+🚫 Заблокированных: {banned_count}
 📈 Всего запросов: {stats.get('total_requests', 0)}
 🚀 Бот запущен: {stats.get('bot_started', 'Неизвестно')[:16]}
 
 🕐 **Текущее время:** {datetime.now().strftime('%d.%m.%Y %H:%M')}
 """
 
-    await callback.message.edit_text(admin_text, reply_markup=get_admin_menu(), parse_mode="Markdown")
+    return admin_text
 
 
-def _calculate_cache_size(weather_api, cat_api):
-    size = 0
-    if weather_api:
-        size += len(str(weather_api.cache))
-    size += len(str(cat_api.cache))
-    return round(size / 1024, 2)
+async def build_detailed_stats_text(user_storage: BaseStorage) -> str:
+    stats = await user_storage.get_statistics()
+    aggregates = user_storage.aggregates
+
+    active_today = aggregates.active_count(timedelta(days=1))
+
+    top_cities = aggregates.top_cities(5)
+    top_cities_text = "\n".join([f"• {city}: {count}" for city, count in top_cities])
+
+    recent_users_text = []
+    for user_id in aggregates.recent_registrations(10):
+        user_info = await user_storage.get_user_info(user_id) or {}
+        username = user_info.get('username', 'Не указан')
+        status = "🚫" if user_storage.is_banned(user_id) else "✅"
+        recent_users_text.append(f"{status} {user_id} (@{username})")
+
+    write_metrics = user_storage.get_write_metrics()
+
+    detailed_stats = f"""
+📊 **Детальная статистика**
+
+👥 **Пользователи:**
+• Всего: {stats.get('total_users', 0)}
+• Активных за сутки: {active_today}
+• Заблокированных: {user_storage.banned_count}
+
+📈 **Активность:**
+• Всего запросов: {stats.get('total_requests', 0)}
+• Избранных городов: {aggregates.total_favorites}
+
+🏆 **Топ городов:**
+{top_cities_text if top_cities_text else "Нет данных"}
+
+📱 **Последние 10 пользователей:**
+{chr(10).join(recent_users_text) if recent_users_text else "Нет данных"}
+
+💾 **Хранилище:**
+• Очередь записи: {write_metrics['queue_depth']}
+• Записей на диск: {write_metrics['writes']} (ошибок: {write_metrics['errors']})
+• Задержка записи: {write_metrics['avg_latency_ms']} мс в среднем, {write_metrics['max_latency_ms']} мс максимум
+
+🚀 **Запуск:** {stats.get('bot_started', 'Неизвестно')[:16]}
+"""
+
+    return detailed_stats
+
+
+async def build_users_overview_text(user_storage: BaseStorage) -> str:
+    aggregates = user_storage.aggregates
+
+    active_today = aggregates.active_count(timedelta(days=1))
+    active_week = aggregates.active_count(timedelta(days=7))
+
+    users_list = []
+    for user_id, last_activity in aggregates.recent_activity(10):
+        user_info = await user_storage.get_user_info(user_id) or {}
+        username = user_info.get('username', 'Не указан')
+        status = "🚫 Заблокирован" if user_storage.is_banned(user_id) else "✅ Активен"
+        activity_str = last_activity.strftime('%d.%m %H:%M') if last_activity.year > 2020 else "Давно"
+        request_count = user_info.get('request_count', 0)
+
+        users_list.append(f"• {user_id} (@{username})\n  {status} | {request_count} запросов | {activity_str}")
+
+    users_text = f"""
+👥 **Управление пользователями**
+
+📊 **Статистика:**
+• Всего пользователей: {aggregates.user_count}
+• Активных за сутки: {active_today}
+• Активных за неделю: {active_week}
+• Заблокированных: {user_storage.banned_count}
+
+📱 **Топ-10 активных пользователей:**
+{chr(10).join(users_list) if users_list else "Нет данных"}
+
+ℹ️ *Пользователи сортированы по последней активности*
+"""
+
+    return users_text
+
+
+def _format_cache_stats(stats: Dict) -> str:
+    ages = ", ".join(f"{label}: {count}" for label, count in stats['ages'])
+    return (
+        f"`{stats['name']}` — записей: {stats['entries']} из {stats['max_entries']}\n"
+        f"  Объём: {round(stats['deep_bytes'] / 1024, 2)} KB"
+        f" (~{stats['deep_bytes'] // stats['entries'] if stats['entries'] else 0} байт на запись)\n"
+        f"  Попадания: {stats['hits']} / промахи: {stats['misses']} ({stats['hit_ratio']:.0%})\n"
+        f"  Вытеснено: {stats['evictions']}, истекло: {stats['expirations']}\n"
+        f"  Возраст: {ages}"
+    )
+
+
+def _format_store_stats(stats: Dict) -> str:
+    return f"`{stats['name']}` — записей: {stats['entries']}, ~{round(stats['bytes'] / 1024, 2)} KB"
+
+
+def _format_cat_pool_stats(pool: CatFactPool) -> str:
+    stats = pool.stats()
+    return (
+        f"Запас фактов: {stats['facts']} из {stats['max_size']}, выдано {stats['served']}\n"
+        f"Пользователей с историей показов: {stats['users']}"
+    )
+
+
+def _format_limiter_stats(limiter: TokenBucketLimiter) -> str:
+    stats = limiter.stats()
+    return (
+        f"Лимит: {stats['rate']} в секунду, подряд до {stats['burst']}\n"
+        f"Пропущено: {stats['allowed']}, отброшено: {stats['dropped']} ({stats['drop_ratio']:.1%})\n"
+        f"Активных пользователей: {stats['buckets']} из {stats['max_buckets']}, вытеснено: {stats['evicted']}"
+    )
+
+
+def _format_upstream_stats(limiter: TokenBucketLimiter) -> str:
+    stats = limiter.stats()
+    return f"{stats['rate']} в секунду, пропущено {stats['allowed']}, отклонено {stats['dropped']}"
+
+
+def _format_breaker_stats(breaker: CircuitBreaker) -> str:
+    stats = breaker.stats()
+    states = {"closed": "✅ работает", "open": "⛔ отключён", "half_open": "🔄 проверка"}
+    latency = f"p50 {stats['p50_ms']} мс, p95 {stats['p95_ms']} мс" if stats['p50_ms'] is not None else "нет данных"
+    return (
+        f"{stats['name']}: {states[stats['state']]}, таймаут {stats['timeout']} с\n"
+        f"  Задержка: {latency}; сбоев: {stats['failures']}, медленных: {stats['slow_calls']}, "
+        f"отклонено: {stats['rejected']}, размыканий: {stats['times_opened']}"
+    )
 
 
 @router.message(Command("allusers"), AdminFilter(ADMIN_IDS))
 async def all_users_command(message: Message):
-    data = await storage.load_data()
-    users_data = data.get("users", {})
-    banned_users = data.get("banned_users", {})
+    users_data = await storage.get_users()
+    banned_users = await storage.get_banned_users()
 
     if not users_data:
         await message.answer("📭 Пользователей не найдено.")
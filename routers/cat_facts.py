@@ -3,18 +3,30 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 import logging
 
-from services.api_client import CatFactsAPI
+from services.shared import get_cat_api, get_cat_fact_pool
 from keyboards.inline import get_main_menu, get_back_button
-from storage.json_storage import JSONStorage
+from storage.shared import get_storage
 
 router = Router()
-cat_api = CatFactsAPI()
-storage = JSONStorage()
+cat_api = get_cat_api()
+cat_fact_pool = get_cat_fact_pool()
+storage = get_storage()
 logger = logging.getLogger(__name__)
 
 
 @router.message(Command("cat"))
 async def cat_fact_command(message: Message):
+    fact = cat_fact_pool.next_fact(message.from_user.id)
+    if fact:
+        await message.answer(
+            f"🐱 **Факт о котах:**\n\n{fact}",
+            reply_markup=get_main_menu(),
+            parse_mode="Markdown"
+        )
+        logger.info(f"Пользователь {message.from_user.id} запросил факт о котах")
+        await storage.update_user_activity(message.from_user.id)
+        return
+
     processing_msg = await message.answer("🐱 Ищу интересный факт о котах...")
 
     fact = await cat_api.get_cat_fact()
@@ -37,9 +49,12 @@ async def cat_fact_command(message: Message):
 
 @router.callback_query(F.data == "cat_fact")
 async def cat_fact_callback(callback: CallbackQuery):
-    await callback.answer("🐱 Загружаю факт...")
-
-    fact = await cat_api.get_cat_fact()
+    fact = cat_fact_pool.next_fact(callback.from_user.id)
+    if fact:
+        await callback.answer()
+    else:
+        await callback.answer("🐱 Загружаю факт...")
+        fact = await cat_api.get_cat_fact()
 
     if fact:
         await callback.message.edit_text(
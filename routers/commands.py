@@ -5,12 +5,12 @@ from aiogram.fsm.context import FSMContext
 import logging
 
 from keyboards.inline import get_main_menu
-from storage.json_storage import JSONStorage
+from storage.shared import get_storage
 from filters.text_length_filter import TextLengthFilter
 from config.settings import ADMIN_IDS
 
 router = Router()
-storage = JSONStorage()
+storage = get_storage()
 logger = logging.getLogger(__name__)
 
 
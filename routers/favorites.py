@@ -7,12 +7,12 @@ import logging
 from keyboards.inline import get_favorites_menu, get_main_menu
 from keyboards.builders import build_cities_keyboard
 from states import FavoriteStates
-from storage.json_storage import JSONStorage
+from storage.shared import get_storage
 from utils.formatters import format_user_list
 from filters.text_length_filter import TextLengthFilter
 
 router = Router()
-storage = JSONStorage()
+storage = get_storage()
 logger = logging.getLogger(__name__)
 
 
@@ -26,7 +26,7 @@ async def favorites_command(message: Message, state: FSMContext):
     await storage.update_user_activity(message.from_user.id)
 
 
-@router.callback_query(F.data == "favorites")
+@router.callback_query(F.data == "favorites", flags={"cost": 0})
 async def favorites_callback(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text(
@@ -149,7 +149,7 @@ async def stats_callback(callback: CallbackQuery):
     await storage.update_user_activity(callback.from_user.id)
 
 
-@router.callback_query(F.data == "back_to_main")
+@router.callback_query(F.data == "back_to_main", flags={"cost": 0})
 async def back_to_main_callback(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text(
@@ -4,18 +4,26 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 import logging
 
-from config.settings import WEATHERSTACK_API_KEY
-from services.api_client import WeatherstackAPI
+from services.shared import get_weather_api
 from utils.formatters import format_weather_message
 from keyboards.inline import get_main_menu, get_back_button
 from states import WeatherStates
-from storage.json_storage import JSONStorage
+from storage.shared import get_storage
 
 router = Router()
-weather_api = WeatherstackAPI(WEATHERSTACK_API_KEY) if WEATHERSTACK_API_KEY else None
-storage = JSONStorage()
+weather_api = get_weather_api()
+storage = get_storage()
 logger = logging.getLogger(__name__)
 
+# Ответы, когда город не удалось проверить: запрос к API не отправлялся или завершился сбоем
+UNAVAILABLE_REPLIES = {
+    "busy": "⏳ Сервис сейчас перегружен, попробуйте через несколько секунд.",
+    "quota": "❌ Месячный лимит запросов к сервису погоды исчерпан.\n"
+             "Попробуйте повторить запрос позже.",
+    "error": "❌ Сервис погоды временно недоступен.\n"
+             "Попробуйте повторить запрос через минуту."
+}
+
 
 @router.message(Command("weather"))
 async def weather_command(message: Message, state: FSMContext):
@@ -39,7 +47,7 @@ async def weather_command(message: Message, state: FSMContext):
     logger.info(f"Пользователь {message.from_user.id} начал ввод города для погоды")
 
 
-@router.callback_query(F.data == "weather")
+@router.callback_query(F.data == "weather", flags={"cost": 0})
 async def weather_callback(callback: CallbackQuery, state: FSMContext):
     if not weather_api:
         await callback.message.edit_text(
@@ -61,7 +69,7 @@ async def weather_callback(callback: CallbackQuery, state: FSMContext):
     logger.info(f"Пользователь {callback.from_user.id} начал ввод города для погоды")
 
 
-@router.message(WeatherStates.waiting_for_city)
+@router.message(WeatherStates.waiting_for_city, flags={"cost": 3})
 async def process_city_name(message: Message, state: FSMContext):
     city = message.text.strip()
 
@@ -78,41 +86,61 @@ async def process_city_name(message: Message, state: FSMContext):
         )
         return
 
+    weather_data = weather_api.get_cached_weather(city)
+    if weather_data:
+        await message.answer(
+            format_weather_message(weather_data),
+            reply_markup=get_main_menu(),
+            parse_mode="Markdown"
+        )
+        logger.info(f"Пользователь {message.from_user.id} получил погоду для города: {city}")
+        await state.clear()
+        await storage.update_user_activity(message.from_user.id)
+        return
+
+    if weather_api.breaker.is_open:
+        await message.answer(UNAVAILABLE_REPLIES["error"], reply_markup=get_back_button())
+        return
+
     processing_msg = await message.answer(
         f"🔄 Получаю актуальную погоду для города **{city}**...\n"
         "⏳ Это займет несколько секунд",
         parse_mode="Markdown"
     )
 
-    weather_data = await weather_api.get_weather(city)
-
-    if weather_data:
-        formatted_message = format_weather_message(weather_data)
-        await processing_msg.edit_text(
-            formatted_message,
-            reply_markup=get_main_menu(),
-            parse_mode="Markdown"
-        )
-        logger.info(f"Пользователь {message.from_user.id} получил погоду для города: {city}")
-    else:
-        await processing_msg.edit_text(
-            f"❌ **Город '{city}' не найден**\n\n"
-            "Возможные причины:\n"
-            "• Проверьте правильность написания\n"
-            "• Попробуйте ввести название на английском\n"
-            "• Укажите более крупный город поблизости\n\n"
-            "Попробуйте еще раз:",
-            reply_markup=get_back_button(),
-            parse_mode="Markdown"
-        )
-        logger.warning(f"Город не найден: {city} (пользователь {message.from_user.id})")
+    weather_data = await weather_api.fetch_weather(city)
+
+    if weather_data is None:
+        reason = weather_api.failure_reason(city)
+        if reason == "not_found":
+            await processing_msg.edit_text(
+                f"❌ **Город '{city}' не найден**\n\n"
+                "Возможные причины:\n"
+                "• Проверьте правильность написания\n"
+                "• Попробуйте ввести название на английском\n"
+                "• Укажите более крупный город поблизости\n\n"
+                "Попробуйте еще раз:",
+                reply_markup=get_back_button(),
+                parse_mode="Markdown"
+            )
+            logger.warning(f"Город не найден: {city} (пользователь {message.from_user.id})")
+        else:
+            await processing_msg.edit_text(UNAVAILABLE_REPLIES[reason], reply_markup=get_back_button())
+            logger.warning(f"Погода для города {city} не получена ({reason}), пользователь {message.from_user.id}")
         return
 
+    await processing_msg.edit_text(
+        format_weather_message(weather_data),
+        reply_markup=get_main_menu(),
+        parse_mode="Markdown"
+    )
+    logger.info(f"Пользователь {message.from_user.id} получил погоду для города: {city}")
+
     await state.clear()
     await storage.update_user_activity(message.from_user.id)
 
 
-@router.callback_query(F.data.startswith("city_"))
+@router.callback_query(F.data.startswith("city_"), flags={"cost": 3})
 async def weather_for_favorite_city(callback: CallbackQuery):
     city = callback.data.replace("city_", "")
 
@@ -120,14 +148,22 @@ async def weather_for_favorite_city(callback: CallbackQuery):
         await callback.answer("❌ Сервис погоды недоступен")
         return
 
-    await callback.answer("🔄 Получаю погоду...")
+    weather_data = weather_api.get_cached_weather(city)
 
-    await callback.message.edit_text(
-        f"🔄 Получаю актуальную погоду для **{city}**...",
-        parse_mode="Markdown"
-    )
+    if weather_data:
+        await callback.answer()
+    elif weather_api.breaker.is_open:
+        await callback.answer("❌ Сервис погоды временно недоступен, попробуйте позже", show_alert=True)
+        return
+    else:
+        await callback.answer("🔄 Получаю погоду...")
+
+        await callback.message.edit_text(
+            f"🔄 Получаю актуальную погоду для **{city}**...",
+            parse_mode="Markdown"
+        )
 
-    weather_data = await weather_api.get_weather(city)
+        weather_data = await weather_api.fetch_weather(city)
 
     if weather_data:
         formatted_message = format_weather_message(weather_data)
@@ -138,17 +174,21 @@ async def weather_for_favorite_city(callback: CallbackQuery):
         )
         logger.info(f"Пользователь {callback.from_user.id} получил погоду для избранного города: {city}")
     else:
-        await callback.message.edit_text(
-            f"❌ Не удалось получить погоду для города **{city}**\n\n"
-            "Возможно, проблемы с API или город был удален из базы данных.",
-            reply_markup=get_main_menu(),
-            parse_mode="Markdown"
-        )
+        reason = weather_api.failure_reason(city)
+        if reason in ("busy", "quota"):
+            await callback.message.edit_text(UNAVAILABLE_REPLIES[reason], reply_markup=get_main_menu())
+        else:
+            await callback.message.edit_text(
+                f"❌ Не удалось получить погоду для города **{city}**\n\n"
+                "Возможно, проблемы с API или город был удален из базы данных.",
+                reply_markup=get_main_menu(),
+                parse_mode="Markdown"
+            )
 
     await storage.update_user_activity(callback.from_user.id)
 
 
-@router.callback_query(F.data == "back_to_main")
+@router.callback_query(F.data == "back_to_main", flags={"cost": 0})
 async def back_to_main_callback(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text(
@@ -1,112 +1,380 @@
+import time
 import aiohttp
 import asyncio
 import logging
-from typing import Optional, Dict
-from datetime import datetime, timedelta
+from collections import Counter
+from typing import Optional, Dict, List, Tuple
+
+from services.cache import TTLCache
+from services.circuit_breaker import CircuitBreaker
+from services.city_index import CityAliasIndex, normalize_query
+from services.http_session import get_session
+from services.persistent_cache import PersistentWeatherCache
+from services.quota import QuotaManager
+from services.rate_limiter import TokenBucketLimiter
+from services.weather_record import WeatherRecord
 
 logger = logging.getLogger(__name__)
 
 
 class WeatherstackAPI:
-    def __init__(self, api_key: str):
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str = "http://api.weatherstack.com",
+            cache_ttl: float = 300,
+            stale_ttl: float = 3600,
+            cache_max_entries: int = 1000,
+            cache_max_bytes: int = 5 * 1024 * 1024,
+            cache_sweep_interval: float = 60,
+            persistent_cache: Optional[PersistentWeatherCache] = None,
+            city_index: Optional[CityAliasIndex] = None,
+            not_found_ttl: float = 600,
+            error_ttl: float = 30,
+            breaker: Optional[CircuitBreaker] = None,
+            quota: Optional[QuotaManager] = None,
+            upstream_limiter: Optional[TokenBucketLimiter] = None
+    ):
         self.api_key = api_key
-        self.base_url = "http://api.weatherstack.com/current"
-        self.cache = {}
-        self.cache_ttl = 300  # 5 минут
+        self.base_url = f"{base_url.rstrip('/')}/current"
+        # cache_ttl — мягкий срок свежести, после него данные ещё stale_ttl секунд отдаются с фоновым обновлением
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        self.cache = TTLCache(
+            "weather",
+            cache_max_entries,
+            cache_max_bytes,
+            default_ttl=cache_ttl + stale_ttl,
+            sweep_interval=cache_sweep_interval
+        )
+        # Отрицательные ответы храним отдельно: несуществующий город помним долго, сбой API — недолго
+        self.negative_cache = TTLCache(
+            "weather_negative",
+            max_entries=cache_max_entries,
+            max_bytes=1024 * 1024,
+            default_ttl=error_ttl,
+            sweep_interval=cache_sweep_interval
+        )
+        self.not_found_ttl = not_found_ttl
+        self.error_ttl = error_ttl
+        self.negative_hits: Counter = Counter()
+        self.persistent_cache = persistent_cache
+        self.city_index = city_index if city_index is not None else CityAliasIndex()
+        self.breaker = breaker if breaker is not None else CircuitBreaker("weatherstack", max_timeout=10)
+        self.quota = quota
+        # Общий на всех пользователей бюджет вызовов API; жетон списывается только перед реальным запросом
+        self.upstream_limiter = upstream_limiter
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_requests = 0
+        self.stale_served = 0
+        # Запросы считаются только для работающего фонового обновления: оно же периодически их прореживает
+        self.track_lookups = False
+        self.lookup_counts: Counter = Counter()
+
+    async def start(self):
+        await self.cache.start()
+        await self.negative_cache.start()
+        await self.city_index.start()
+        if self.quota:
+            await self.quota.start()
+        if self.persistent_cache:
+            await self.persistent_cache.start()
+            await self._warm_from_disk()
+
+    async def close(self):
+        await self.cache.stop()
+        await self.negative_cache.stop()
+        await self.city_index.close()
+        if self.quota:
+            await self.quota.close()
+        if self.persistent_cache:
+            await self.persistent_cache.close()
+
+    async def _warm_from_disk(self):
+        now = time.time()
+        loaded = 0
+        for city_key, payload, fetched_at in await self.persistent_cache.load():
+            # Тот же срок, что и при записи из сети: при режиме экономии квоты свежесть продлена
+            remaining = self.fresh_ttl + self.stale_ttl - (now - fetched_at)
+            if remaining > 0:
+                self.cache.set(city_key, WeatherRecord.from_payload(payload, fetched_at), ttl=remaining)
+                loaded += 1
+        logger.info(f"Из дискового кэша загружено городов: {loaded}")
+
+    @property
+    def fresh_ttl(self) -> float:
+        """Срок свежести данных; при угрозе превышения квоты он удлиняется."""
+        if self.quota:
+            return self.cache_ttl * self.quota.ttl_factor
+        return self.cache_ttl
+
+    @staticmethod
+    def normalize_city(city: str) -> str:
+        return normalize_query(city)
+
+    def cache_key(self, city: str) -> str:
+        """Ключ кэша: каноническое место, если запрос уже встречался, иначе нормализованный запрос."""
+        alias = self.normalize_city(city)
+        return self.city_index.resolve(alias) or alias
 
-    def _is_cache_valid(self, city: str) -> bool:
-        if city not in self.cache:
+    def cache_age(self, city: str) -> Optional[float]:
+        record = self.cache.peek(self.cache_key(city))
+        return time.time() - record.fetched_at if record else None
+
+    def decay_lookup_counts(self):
+        for city_key in list(self.lookup_counts):
+            self.lookup_counts[city_key] //= 2
+            if not self.lookup_counts[city_key]:
+                del self.lookup_counts[city_key]
+
+    def _negative_hit(self, city_key: str) -> bool:
+        kind = self.negative_cache.get(city_key)
+        if kind is None:
             return False
+        self.negative_hits[kind] += 1
+        return True
+
+    async def refresh(self, city: str) -> Optional[bool]:
+        """Фоновое обновление: True — данные обновлены, False — API ответил ошибкой, None — запрос не отправлялся."""
+        city_key = self.cache_key(city)
+        # Фоновые проверки не учитываются в статистике негативного кэша, она отражает запросы пользователей
+        if city_key in self._inflight or city_key in self.negative_cache:
+            return None
+
+        data = await asyncio.shield(self._start_fetch(city))
+        if data is not None:
+            return True
+        # Запись в негативном кэше после нашего запроса означает, что API ответил; иначе его не вызывали
+        return False if self.negative_cache.peek(city_key) in ("not_found", "error") else None
 
-        cache_time = self.cache[city]['timestamp']
-        return datetime.now() - cache_time < timedelta(seconds=self.cache_ttl)
+    def get_cached_weather(self, city: str) -> Optional[WeatherRecord]:
+        """Данные из кэша без ожидания сети; устаревшие данные запускают фоновое обновление."""
+        alias = self.normalize_city(city)
+        if self.track_lookups:
+            self.lookup_counts[alias] += 1
+        city_key = self.city_index.resolve(alias) or alias
 
-    async def get_weather(self, city: str) -> Optional[Dict]:
-        city_lower = city.lower()
+        record = self.cache.get(city_key)
+        if record is None:
+            return None
 
-        if self._is_cache_valid(city_lower):
+        age = time.time() - record.fetched_at
+        if age < self.fresh_ttl:
             logger.info(f"Возвращаем данные из кэша для города: {city}")
-            return self.cache[city_lower]['data']
+            return record
+
+        if city_key not in self._inflight and city_key not in self.negative_cache:
+            logger.info(f"Данные для города {city} устарели, обновляем в фоне")
+            self._start_fetch(city)
+
+        self.stale_served += 1
+        return record.with_stale_age(age)
+
+    async def get_weather(self, city: str) -> Optional[WeatherRecord]:
+        cached = self.get_cached_weather(city)
+        if cached is not None:
+            return cached
+        return await self.fetch_weather(city)
+
+    async def fetch_weather(self, city: str) -> Optional[WeatherRecord]:
+        """Запрос к API после промаха get_cached_weather: статистика кэша и счётчик запросов не учитываются второй раз."""
+        city_key = self.cache_key(city)
+        # Пока обработчик отвечал пользователю, данные мог получить параллельный запрос
+        record = self.cache.peek(city_key)
+        if record is not None and time.time() - record.fetched_at < self.fresh_ttl:
+            return record
+
+        if self._negative_hit(city_key):
+            logger.info(f"Город {city} недавно не удалось получить, повторный запрос к API пропущен")
+            return None
+
+        return await asyncio.shield(self._start_fetch(city))
+
+    def failure_reason(self, city: str) -> str:
+        """Почему не удалось получить погоду: not_found — город не существует, quota, busy или error — город не проверен."""
+        kind = self.negative_cache.peek(self.cache_key(city))
+        if kind == "not_found":
+            return kind
+        if self.quota and self.quota.exhausted:
+            return "quota"
+        # Без записи в негативном кэше запрос не отправлялся: предохранитель разомкнут
+        return kind or "error"
+
+    def _start_fetch(self, city: str) -> asyncio.Task:
+        city_key = self.cache_key(city)
+
+        # Одновременные запросы одного города ждут общий вызов API
+        request = self._inflight.get(city_key)
+        if request is not None:
+            self.coalesced_requests += 1
+            logger.info(f"Присоединяемся к уже идущему запросу погоды для города: {city}")
+            return request
+
+        request = asyncio.create_task(self._fetch_weather(city, city_key))
+        self._inflight[city_key] = request
+        request.add_done_callback(lambda _: self._inflight.pop(city_key, None))
+        return request
+
+    async def _fetch_weather(self, city: str, request_key: str) -> Optional[WeatherRecord]:
+        if self.quota and not self.quota.allow_call():
+            logger.warning(f"Месячная квота Weatherstack исчерпана, запрос погоды для города {city} не отправлен")
+            return None
+
+        if self.upstream_limiter and not self.upstream_limiter.consume("weatherstack"):
+            logger.warning(f"Общий бюджет запросов к Weatherstack исчерпан, запрос погоды для города {city} отложен")
+            self.negative_cache.set(request_key, "busy", ttl=1)
+            return None
+
+        if not self.breaker.allow_request():
+            logger.warning(f"Weatherstack временно недоступен, запрос погоды для города {city} не отправлен")
+            return None
+
+        data = await self._request_weather(city, request_key)
+        if data is not None:
+            self.negative_cache.delete(request_key)
+        return data
+
+    def _remember_failure(self, request_key: str, kind: str, latency: Optional[float] = None):
+        ttl = self.not_found_ttl if kind == "not_found" else self.error_ttl
+        self.negative_cache.set(request_key, kind, ttl=ttl)
+        if kind == "error":
+            self.breaker.record_failure(latency)
 
+    async def _request_weather(self, city: str, request_key: str) -> Optional[WeatherRecord]:
         params = {
             'access_key': self.api_key,
             'query': city,
             'units': 'm'
         }
 
+        if self.quota:
+            self.quota.record_call()
+
+        started = time.monotonic()
         try:
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.base_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-
-                        if 'error' in data:
-                            error_code = data['error'].get('code')
-                            error_info = data['error'].get('info', 'Неизвестная ошибка')
-
-                            if error_code == 615:  # Location not found
-                                logger.warning(f"Город не найден: {city}")
-                                return None
-                            else:
-                                logger.error(f"Ошибка API: {error_info}")
-                                return None
-
-                        self.cache[city_lower] = {
-                            'data': data,
-                            'timestamp': datetime.now()
-                        }
-
-                        logger.info(f"Получены данные о погоде для города: {city}")
-                        return data
-                    else:
-                        logger.error(f"API вернул статус {response.status}")
-                        return None
+            session = await get_session()
+            async with session.get(self.base_url, params=params, timeout=self.breaker.timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+
+                    if data.get('error', {}).get('code') in (None, 615):
+                        self.breaker.record_success(time.monotonic() - started)
+
+                    if 'error' in data:
+                        error_code = data['error'].get('code')
+                        error_info = data['error'].get('info', 'Неизвестная ошибка')
+
+                        if error_code == 615:  # Location not found
+                            logger.warning(f"Город не найден: {city}")
+                            self._remember_failure(request_key, "not_found")
+                            return None
+                        else:
+                            logger.error(f"Ошибка API: {error_info}")
+                            self._remember_failure(request_key, "error")
+                            return None
+
+                    city_key = self.city_index.learn(self.normalize_city(city), data.get('location') or {})
+                    record = WeatherRecord.from_response(data, time.time())
+                    self.cache.set(city_key, record, ttl=self.fresh_ttl + self.stale_ttl)
+                    if self.persistent_cache:
+                        self.persistent_cache.put(city_key, record.to_payload(), record.fetched_at)
+
+                    logger.info(f"Получены данные о погоде для города: {city}")
+                    return record
+                else:
+                    logger.error(f"API вернул статус {response.status}")
+                    self._remember_failure(request_key, "error")
+                    return None
 
         except asyncio.TimeoutError:
             logger.error(f"Таймаут при запросе погоды для города: {city}")
+            self._remember_failure(request_key, "error", latency=time.monotonic() - started)
             return None
         except aiohttp.ClientError as e:
             logger.error(f"Ошибка клиента при запросе погоды: {e}")
+            self._remember_failure(request_key, "error")
             return None
         except Exception as e:
             logger.error(f"Неожиданная ошибка при запросе погоды: {e}")
+            self.breaker.record_failure()
             return None
 
 
 class CatFactsAPI:
-    def __init__(self):
-        self.base_url = "https://catfact.ninja/fact"
-        self.cache = {}
-        self.cache_ttl = 60
+    def __init__(
+            self,
+            cache_ttl: float = 60,
+            breaker: Optional[CircuitBreaker] = None,
+            base_url: str = "https://catfact.ninja"
+    ):
+        self.base_url = f"{base_url.rstrip('/')}/fact"
+        self.facts_url = f"{base_url.rstrip('/')}/facts"
+        self.cache_ttl = cache_ttl
+        self.cache = TTLCache("cat_facts", max_entries=1, max_bytes=64 * 1024, default_ttl=cache_ttl)
+        self.breaker = breaker if breaker is not None else CircuitBreaker("catfact", max_timeout=5)
+        self._last_fact: Optional[str] = None
 
     async def get_cat_fact(self) -> Optional[str]:
-        if 'last_fact' in self.cache:
-            cache_time = self.cache['last_fact']['timestamp']
-            if datetime.now() - cache_time < timedelta(seconds=self.cache_ttl):
-                return self.cache['last_fact']['data']
+        cached = self.cache.get('last_fact')
+        if cached is not None:
+            return cached
 
+        if not self.breaker.allow_request():
+            # Пока API недоступен, повторяем последний полученный факт
+            return self._last_fact
+
+        started = time.monotonic()
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.base_url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        fact = data.get('fact', 'Факт не найден')
-
-                        self.cache['last_fact'] = {
-                            'data': fact,
-                            'timestamp': datetime.now()
-                        }
-
-                        return fact
-                    else:
-                        logger.error(f"Cat Facts API вернул статус {response.status}")
-                        return None
+            session = await get_session()
+            async with session.get(self.base_url, timeout=self.breaker.timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    fact = data.get('fact', 'Факт не найден')
+                    self.breaker.record_success(time.monotonic() - started)
+
+                    self.cache.set('last_fact', fact)
+                    self._last_fact = fact
+
+                    return fact
+                else:
+                    logger.error(f"Cat Facts API вернул статус {response.status}")
+                    self.breaker.record_failure()
+                    return self._last_fact
 
         except asyncio.TimeoutError:
             logger.error("Таймаут при запросе факта о котах")
-            return None
+            self.breaker.record_failure(time.monotonic() - started)
+            return self._last_fact
         except Exception as e:
             logger.error(f"Ошибка при запросе факта о котах: {e}")
+            self.breaker.record_failure()
+            return self._last_fact
+
+    async def get_facts_page(self, page: int, limit: int = 100) -> Optional[Tuple[List[str], int]]:
+        """Страница списка фактов и номер последней страницы."""
+        if not self.breaker.allow_request():
+            return None
+
+        started = time.monotonic()
+        try:
+            session = await get_session()
+            params = {'page': page, 'limit': limit}
+            async with session.get(self.facts_url, params=params, timeout=self.breaker.timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    self.breaker.record_success(time.monotonic() - started)
+                    facts = [item['fact'] for item in data.get('data', []) if item.get('fact')]
+                    return facts, data.get('last_page', page)
+                else:
+                    logger.error(f"Cat Facts API вернул статус {response.status}")
+                    self.breaker.record_failure()
+                    return None
+
+        except asyncio.TimeoutError:
+            logger.error("Таймаут при запросе списка фактов о котах")
+            self.breaker.record_failure(time.monotonic() - started)
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка при запросе списка фактов о котах: {e}")
+            self.breaker.record_failure()
             return None
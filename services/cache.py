@@ -0,0 +1,247 @@
+import sys
+import time
+import weakref
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from storage.writer import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """Приблизительный размер объекта в памяти вместе с вложенными контейнерами."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif hasattr(value, '__slots__'):
+        size += sum(estimate_size(getattr(value, slot)) for slot in value.__slots__ if hasattr(value, slot))
+    return size
+
+
+class CacheEntry:
+    __slots__ = ("value", "created_at", "expires_at", "size")
+
+    def __init__(self, value: Any, created_at: float, expires_at: float, size: int):
+        self.value = value
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TTLCache:
+    """Кэш с ограничением по числу записей и объёму, вытеснением LRU и временем жизни записей."""
+
+    def __init__(
+            self,
+            name: str,
+            max_entries: int = 1000,
+            max_bytes: int = 5 * 1024 * 1024,
+            default_ttl: float = 300,
+            sweep_interval: float = 60
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._sweep_task = PeriodicTask(f"очистка кэша {name}", self._sweep_and_log, sweep_interval)
+
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        get_cache_registry().register(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Значение без учёта в статистике и без изменения порядка вытеснения."""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.monotonic()
+        entry = CacheEntry(value, now, now + (self.default_ttl if ttl is None else ttl), estimate_size(value))
+        if entry.size > self.max_bytes:
+            logger.warning(f"Запись {key!r} не помещается в кэш {self.name}: {entry.size} байт")
+            return
+
+        self._entries[key] = entry
+        self.resident_bytes += entry.size
+        self._evict()
+
+    def delete(self, key: Hashable) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.resident_bytes = 0
+
+    def resize(self, max_entries: int) -> int:
+        """Меняет предельное число записей на лету; лишние записи вытесняются сразу."""
+        before = len(self._entries)
+        self.max_entries = max(1, max_entries)
+        self._evict()
+        return before - len(self._entries)
+
+    def deep_size(self) -> int:
+        """Точный пересчёт занимаемой памяти вместе с ключами и служебными объектами записей."""
+        return sys.getsizeof(self._entries) + sum(
+            estimate_size(key) + sys.getsizeof(entry) + estimate_size(entry.value)
+            for key, entry in self._entries.items()
+        )
+
+    def age_distribution(self, bounds: Tuple[int, ...] = (60, 300, 900, 3600)) -> List[Tuple[str, int]]:
+        """Число записей по возрасту: до 1 мин, до 5 мин и т.д., последняя группа — старше всех границ."""
+        counts = [0] * (len(bounds) + 1)
+        now = time.monotonic()
+        for entry in self._entries.values():
+            age = now - entry.created_at
+            index = 0
+            while index < len(bounds) and age >= bounds[index]:
+                index += 1
+            counts[index] += 1
+
+        labels = [f"<{_format_seconds(bound)}" for bound in bounds] + [f"≥{_format_seconds(bounds[-1])}"]
+        return list(zip(labels, counts))
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.resident_bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.resident_bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self.resident_bytes -= entry.size
+            self.evictions += 1
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    async def start(self):
+        self._sweep_task.start()
+
+    async def stop(self):
+        await self._sweep_task.stop()
+
+    async def _sweep_and_log(self):
+        removed = self.sweep()
+        if removed:
+            logger.info(f"Из кэша {self.name} удалено просроченных записей: {removed}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+def _format_seconds(seconds: int) -> str:
+    if seconds < 60:
+        return f"{seconds}с"
+    if seconds < 3600:
+        return f"{seconds // 60}м"
+    return f"{seconds // 3600}ч"
+
+
+class CacheRegistry:
+    """Все кэши процесса: общий отчёт и управление отдельными кэшами из админки.
+
+    Кроме TTLCache здесь регистрируются прочие производные хранилища (индексы, счётчики, дисковый кэш).
+    Им достаточно методов clear() и cache_stats() -> {"entries", "bytes"}; очищаются они вместе с кэшами.
+    """
+
+    def __init__(self):
+        self._caches: "weakref.WeakValueDictionary[str, TTLCache]" = weakref.WeakValueDictionary()
+        self._stores: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+    def register(self, cache: TTLCache):
+        self._caches[cache.name] = cache
+
+    def register_store(self, name: str, store: Any):
+        self._stores[name] = store
+
+    def get(self, name: str) -> Optional[TTLCache]:
+        return self._caches.get(name)
+
+    def caches(self) -> List[TTLCache]:
+        return [self._caches[name] for name in sorted(self._caches.keys())]
+
+    def total_bytes(self) -> int:
+        return sum(cache.resident_bytes for cache in self.caches())
+
+    def stores(self) -> List[Tuple[str, Any]]:
+        return [(name, self._stores[name]) for name in sorted(self._stores.keys())]
+
+    def clear_all(self):
+        for cache in self.caches():
+            cache.clear()
+        for _, store in self.stores():
+            store.clear()
+
+    def report(self) -> List[Dict]:
+        return [
+            dict(cache.stats(), deep_bytes=cache.deep_size(), ages=cache.age_distribution())
+            for cache in self.caches()
+        ]
+
+    def store_report(self) -> List[Dict]:
+        return [dict(store.cache_stats(), name=name) for name, store in self.stores()]
+
+
+_registry = CacheRegistry()
+
+
+def get_cache_registry() -> CacheRegistry:
+    return _registry
@@ -0,0 +1,162 @@
+import json
+import random
+import logging
+from functools import partial
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from pathlib import Path
+
+from services.api_client import CatFactsAPI
+from services.cache import estimate_size, get_cache_registry
+from storage.writer import PeriodicSaver, PeriodicTask, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+class CatFactPool:
+    """Локальный запас фактов о котах, пополняемый страницами из /facts.
+
+    Для каждого пользователя хранится битовая маска уже показанных фактов (бит i — факт с индексом i),
+    поэтому факты не повторяются, пока пользователь не увидит весь запас.
+    """
+
+    def __init__(
+            self,
+            cat_api: CatFactsAPI,
+            file_path: Optional[str] = None,
+            max_size: int = 500,
+            page_size: int = 100,
+            refill_interval: float = 6 * 3600,
+            max_users: int = 100000
+    ):
+        self.cat_api = cat_api
+        self.file_path = Path(file_path) if file_path else None
+        self.max_size = max_size
+        self.page_size = page_size
+        self.refill_interval = refill_interval
+        self.max_users = max_users
+
+        self._facts: List[str] = []
+        self._known: Set[str] = set()
+        self._next_page = 1
+        self._seen: "OrderedDict[int, int]" = OrderedDict()
+        # Пока запас пуст, пополнение повторяется чаще
+        self._refill_task = PeriodicTask(
+            "пополнение запаса фактов о котах",
+            self.refill,
+            lambda: self.refill_interval if self._facts else min(60.0, self.refill_interval),
+            run_immediately=True
+        )
+        self._saver: Optional[PeriodicSaver] = None
+        if self.file_path:
+            self._saver = PeriodicSaver(
+                "запаса фактов о котах",
+                lambda: json.dumps({'facts': self._facts, 'next_page': self._next_page}, ensure_ascii=False),
+                partial(atomic_write_text, self.file_path)
+            )
+
+        self.served = 0
+        self.refills = 0
+
+        if self.file_path and self.file_path.exists():
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self._add_facts(saved.get('facts', []))
+                self._next_page = saved.get('next_page', 1)
+            except Exception as e:
+                logger.error(f"Ошибка загрузки запаса фактов о котах: {e}")
+
+        # Сами факты — данные, а не кэш; очищается только история показов
+        get_cache_registry().register_store("cat_facts_seen", self)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def clear(self):
+        self._seen.clear()
+
+    def cache_stats(self) -> Dict:
+        return {"entries": len(self._seen), "bytes": estimate_size(self._seen)}
+
+    def _add_facts(self, facts: List[str]) -> int:
+        added = 0
+        for fact in facts:
+            if len(self._facts) >= self.max_size:
+                break
+            if fact and fact not in self._known:
+                # Факты только дописываются в конец, чтобы индексы в масках пользователей оставались верными
+                self._facts.append(fact)
+                self._known.add(fact)
+                added += 1
+        return added
+
+    def next_fact(self, user_id: int) -> Optional[str]:
+        """Случайный факт, который пользователь ещё не видел; None, если запас пуст."""
+        count = len(self._facts)
+        if not count:
+            return None
+
+        seen = self._seen.pop(user_id, 0)
+        all_seen = (1 << count) - 1
+        if seen & all_seen == all_seen:
+            seen = 0
+
+        start = random.randrange(count)
+        index = start
+        for offset in range(count):
+            index = (start + offset) % count
+            if not seen >> index & 1:
+                break
+
+        self._seen[user_id] = seen | (1 << index)
+        if len(self._seen) > self.max_users:
+            self._seen.popitem(last=False)
+
+        self.served += 1
+        return self._facts[index]
+
+    async def refill(self) -> int:
+        added = 0
+        while len(self._facts) < self.max_size:
+            page = await self.cat_api.get_facts_page(self._next_page, self.page_size)
+            if page is None:
+                break
+
+            facts, last_page = page
+            added += self._add_facts(facts)
+            if self._next_page >= last_page:
+                # Источник прочитан целиком; при следующем пополнении начнём сначала
+                self._next_page = 1
+                break
+            self._next_page += 1
+
+        if added:
+            self.refills += 1
+            logger.info(f"В запас добавлено фактов о котах: {added}, всего {len(self._facts)}")
+            await self.save()
+        return added
+
+    async def save(self):
+        if self._saver:
+            self._saver.mark_dirty()
+            await self._saver.save()
+
+    async def start(self):
+        self._refill_task.start()
+        if self._saver:
+            self._saver.start()
+
+    async def close(self):
+        await self._refill_task.stop()
+        if self._saver:
+            await self._saver.close()
+
+    def stats(self) -> Dict:
+        return {
+            "facts": len(self._facts),
+            "max_size": self.max_size,
+            "users": len(self._seen),
+            "served": self.served,
+            "refills": self.refills
+        }
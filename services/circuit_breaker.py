@@ -0,0 +1,139 @@
+import time
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Предохранитель внешнего API: после серии сбоев или медленных ответов перестаёт слать запросы
+    на recovery_timeout секунд, затем пропускает одиночный пробный запрос."""
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            recovery_timeout: float = 30,
+            min_timeout: float = 1,
+            max_timeout: float = 10,
+            slow_call_threshold: Optional[float] = None,
+            timeout_multiplier: float = 3,
+            latency_window: int = 200,
+            min_samples: int = 20
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.slow_call_threshold = slow_call_threshold if slow_call_threshold is not None else max_timeout / 2
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+
+        self.state = CLOSED
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Запросы сейчас отклоняются; в отличие от allow_request не меняет состояние."""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.recovery_timeout
+
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self.state = HALF_OPEN
+            self._probe_started = None
+            logger.info(f"Предохранитель {self.name}: пробный запрос")
+
+        if self.state == CLOSED:
+            return True
+
+        # В полуоткрытом состоянии одновременно идёт только один пробный запрос
+        if self.state == HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started > self.max_timeout):
+            self._probe_started = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float):
+        self._latencies.append(latency)
+        if latency > self.slow_call_threshold:
+            self.slow_calls += 1
+            self._on_failure()
+            return
+
+        self._consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Предохранитель {self.name}: API снова отвечает")
+        self.state = CLOSED
+        self._probe_started = None
+
+    def record_failure(self, latency: Optional[float] = None):
+        """latency передаётся для запросов, прерванных по таймауту: без этого замера
+        таймаут, однажды сжавшийся до min_timeout, уже не смог бы вырасти."""
+        if latency is not None:
+            self._latencies.append(latency)
+        self.failures += 1
+        self._on_failure()
+
+    def _on_failure(self):
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                logger.warning(f"Предохранитель {self.name} разомкнут на {self.recovery_timeout} с")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_started = None
+
+    def latency_percentile(self, p: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    @property
+    def current_timeout(self) -> float:
+        """Таймаут по наблюдаемому p95 задержки с запасом, в пределах [min_timeout, max_timeout]."""
+        # Пробный запрос после сбоев получает полный таймаут: API может быть исправен, но медленнее прежнего
+        if self.state != CLOSED or len(self._latencies) < self.min_samples:
+            return self.max_timeout
+        p95 = self.latency_percentile(95)
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_multiplier))
+
+    @property
+    def timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.current_timeout)
+
+    def stats(self) -> Dict:
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            "name": self.name,
+            "state": OPEN if self.is_open else (HALF_OPEN if self.state == OPEN else self.state),
+            "consecutive_failures": self._consecutive_failures,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+            "timeout": round(self.current_timeout, 2),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
@@ -0,0 +1,103 @@
+import json
+import logging
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Optional
+from pathlib import Path
+
+from services.cache import estimate_size, get_cache_registry
+from storage.writer import PeriodicSaver, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(city: str) -> str:
+    city = " ".join(city.casefold().replace("ё", "е").split())
+    return ", ".join(part.strip() for part in city.split(",") if part.strip())
+
+
+def canonical_key(location: Dict) -> Optional[str]:
+    """Ключ места: название, страна и координаты с точностью около километра, чтобы тёзки не смешивались."""
+    name = location.get('name')
+    if not name:
+        return None
+
+    try:
+        coordinates = f"{float(location['lat']):.2f},{float(location['lon']):.2f}"
+    except (KeyError, TypeError, ValueError):
+        coordinates = ""
+    return f"{normalize_query(name)}|{normalize_query(location.get('country') or '')}|{coordinates}"
+
+
+class CityAliasIndex:
+    """Соответствие введённых пользователями названий каноническому месту из ответа Weatherstack."""
+
+    def __init__(self, file_path: Optional[str] = None, max_aliases: int = 100000, save_interval: float = 60):
+        self.file_path = Path(file_path) if file_path else None
+        self.max_aliases = max_aliases
+        self.save_interval = save_interval
+
+        # Порядок — от давно не использованных к недавним: при переполнении вытесняются старые написания
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._saver: Optional[PeriodicSaver] = None
+        if self.file_path:
+            self._saver = PeriodicSaver(
+                "индекса городов",
+                lambda: json.dumps(self._aliases, ensure_ascii=False),
+                partial(atomic_write_text, self.file_path),
+                save_interval
+            )
+
+        if self.file_path and self.file_path.exists():
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    aliases: Dict[str, str] = json.load(f)
+                # Ключи старого формата без координат не различали тёзок, их соответствия узнаются заново
+                self._aliases.update((alias, key) for alias, key in aliases.items() if key.count("|") == 2)
+            except Exception as e:
+                logger.error(f"Ошибка загрузки индекса городов: {e}")
+
+        get_cache_registry().register_store("city_aliases", self)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def clear(self):
+        self._aliases.clear()
+        self._mark_dirty()
+
+    def cache_stats(self) -> Dict:
+        return {"entries": len(self._aliases), "bytes": estimate_size(self._aliases)}
+
+    def resolve(self, alias: str) -> Optional[str]:
+        key = self._aliases.get(alias)
+        if key is not None:
+            self._aliases.move_to_end(alias)
+        return key
+
+    def learn(self, alias: str, location: Dict) -> str:
+        """Запоминает, к какому месту привёл запрос, и возвращает ключ для кэша."""
+        key = canonical_key(location) or alias
+        if self._aliases.get(alias) != key:
+            self._aliases[alias] = key
+            self._mark_dirty()
+        self._aliases.move_to_end(alias)
+        while len(self._aliases) > self.max_aliases:
+            self._aliases.popitem(last=False)
+        return key
+
+    def _mark_dirty(self):
+        if self._saver:
+            self._saver.mark_dirty()
+
+    async def save(self):
+        if self._saver:
+            await self._saver.save()
+
+    async def start(self):
+        if self._saver:
+            self._saver.start()
+
+    async def close(self):
+        if self._saver:
+            await self._saver.close()
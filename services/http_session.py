@@ -0,0 +1,42 @@
+import aiohttp
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def create_session(
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300
+) -> aiohttp.ClientSession:
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl
+    )
+    _session = aiohttp.ClientSession(connector=connector)
+    logger.info(f"Создана общая HTTP сессия: до {limit} соединений, {limit_per_host} на хост")
+    return _session
+
+
+async def get_session() -> aiohttp.ClientSession:
+    if _session is None or _session.closed:
+        return await create_session()
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Общая HTTP сессия закрыта")
+    _session = None
@@ -0,0 +1,102 @@
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+
+from services.cache import get_cache_registry
+from storage.writer import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentWeatherCache:
+    """Дисковый уровень кэша погоды: переживает перезапуски, пишется пачками вне event loop."""
+
+    def __init__(self, db_path: str = "storage/weather_cache.db", max_age: float = 3900, flush_interval: float = 5):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        self._clear_requested = False
+        self._flush_task = PeriodicTask("запись дискового кэша погоды", self.flush, flush_interval)
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS weather_cache ("
+            "city_key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        get_cache_registry().register_store("weather_disk", self)
+
+    def clear(self):
+        """Удаление записей выполняет ближайший сброс на диск, чтобы не конкурировать с ним за соединение."""
+        self._pending.clear()
+        self._clear_requested = True
+
+    def cache_stats(self) -> Dict:
+        entries = self._conn.execute("SELECT COUNT(*) FROM weather_cache").fetchone()[0]
+        return {"entries": entries, "bytes": self.db_path.stat().st_size if self.db_path.exists() else 0}
+
+    def put(self, city_key: str, data: Any, fetched_at: float):
+        # Только кладём в очередь: сериализация и запись выполняются фоновой задачей
+        self._pending[city_key] = (data, fetched_at)
+
+    def _load(self) -> List[Tuple[str, Any, float]]:
+        cutoff = time.time() - self.max_age
+        with self._conn:
+            self._conn.execute("DELETE FROM weather_cache WHERE fetched_at < ?", (cutoff,))
+        rows = self._conn.execute("SELECT city_key, payload, fetched_at FROM weather_cache").fetchall()
+        return [(city_key, json.loads(payload), fetched_at) for city_key, payload, fetched_at in rows]
+
+    async def load(self) -> List[Tuple[str, Any, float]]:
+        """Записи, которые ещё не старше max_age от исходного времени получения."""
+        try:
+            return await asyncio.to_thread(self._load)
+        except Exception as e:
+            logger.error(f"Ошибка чтения дискового кэша погоды: {e}")
+            return []
+
+    def _write(self, rows: List[Tuple[str, str, float]], clear: bool = False):
+        with self._conn:
+            if clear:
+                self._conn.execute("DELETE FROM weather_cache")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO weather_cache (city_key, payload, fetched_at) VALUES (?, ?, ?)", rows
+            )
+
+    async def flush(self):
+        if not self._pending and not self._clear_requested:
+            return
+
+        pending, self._pending = self._pending, {}
+        clear, self._clear_requested = self._clear_requested, False
+        rows = [
+            (city_key, json.dumps(data, ensure_ascii=False), fetched_at)
+            for city_key, (data, fetched_at) in pending.items()
+        ]
+        try:
+            await asyncio.to_thread(self._write, rows, clear)
+        except Exception as e:
+            # Несохранённые записи возвращаются в очередь, если кэш не очистили во время записи
+            if not self._clear_requested:
+                for city_key, entry in pending.items():
+                    self._pending.setdefault(city_key, entry)
+            self._clear_requested = self._clear_requested or clear
+            logger.error(f"Ошибка записи дискового кэша погоды: {e}")
+
+    async def start(self):
+        self._flush_task.start()
+
+    async def close(self):
+        await self._flush_task.stop()
+        await self.flush()
+        await asyncio.to_thread(self._conn.close)
+
@@ -0,0 +1,134 @@
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+from services.api_client import WeatherstackAPI
+from storage.base import BaseStorage
+from storage.writer import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherPrefetcher:
+    """Фоновое обновление погоды для популярных городов незадолго до истечения кэша."""
+
+    def __init__(
+            self,
+            weather_api: WeatherstackAPI,
+            storage: BaseStorage,
+            top_n: int = 20,
+            hourly_budget: int = 100,
+            interval: float = 60,
+            refresh_margin: float = 60,
+            favorite_weight: float = 3.0
+    ):
+        self.weather_api = weather_api
+        self.storage = storage
+        self.top_n = top_n
+        self.hourly_budget = hourly_budget
+        self.interval = interval
+        self.refresh_margin = refresh_margin
+        self.favorite_weight = favorite_weight
+
+        self._calls: deque = deque()
+        # Города, которых нет в Weatherstack: обновлять их в фоне бессмысленно
+        self._not_found: Set[str] = set()
+        self._task = PeriodicTask("фоновое обновление погоды", self._run_and_log, interval, run_immediately=True)
+        self.refreshed = 0
+        self.skipped_by_budget = 0
+        self.paused_by_quota = 0
+
+    @property
+    def calls_last_hour(self) -> int:
+        cutoff = time.monotonic() - 3600
+        while self._calls and self._calls[0] < cutoff:
+            self._calls.popleft()
+        return len(self._calls)
+
+    def rank_cities(self) -> List[Tuple[str, float]]:
+        """Города по убыванию популярности: число добавлений в избранное и недавние запросы."""
+        scores: Dict[str, float] = {}
+        queries: Dict[str, str] = {}
+
+        for city, count in self.storage.aggregates.city_counts.items():
+            city_key = self.weather_api.cache_key(city)
+            scores[city_key] = scores.get(city_key, 0) + count * self.favorite_weight
+            queries.setdefault(city_key, city)
+
+        for alias, count in self.weather_api.lookup_counts.items():
+            city_key = self.weather_api.cache_key(alias)
+            scores[city_key] = scores.get(city_key, 0) + count
+            queries.setdefault(city_key, alias)
+
+        # Забываем несуществующие города, которые больше не встречаются в избранном и запросах
+        self._not_found.intersection_update(scores)
+        candidates = [item for item in scores.items() if item[0] not in self._not_found]
+
+        ranked = sorted(candidates, key=lambda item: item[1], reverse=True)[:self.top_n]
+        return [(queries[city_key], score) for city_key, score in ranked]
+
+    @property
+    def paused(self) -> bool:
+        quota = self.weather_api.quota
+        return quota is not None and quota.over_budget
+
+    async def run_once(self) -> int:
+        if self.paused:
+            self.paused_by_quota += 1
+            logger.info("Фоновые обновления погоды приостановлены: прогноз расхода превышает квоту")
+            self.weather_api.decay_lookup_counts()
+            return 0
+
+        refreshed = 0
+        for city, _ in self.rank_cities():
+            age = self.weather_api.cache_age(city)
+            if age is not None and age < self.weather_api.fresh_ttl - self.refresh_margin:
+                continue
+
+            if self.calls_last_hour >= self.hourly_budget:
+                self.skipped_by_budget += 1
+                logger.info("Бюджет фоновых обновлений погоды на час исчерпан")
+                break
+
+            result = await self.weather_api.refresh(city)
+            if result is None:
+                continue
+
+            self._calls.append(time.monotonic())
+            if result:
+                refreshed += 1
+            elif self.weather_api.failure_reason(city) == "not_found":
+                self._not_found.add(self.weather_api.cache_key(city))
+
+        # Старые запросы постепенно теряют вес, чтобы рейтинг отражал текущий спрос
+        self.weather_api.decay_lookup_counts()
+        self.refreshed += refreshed
+        return refreshed
+
+    async def start(self):
+        if not self._task.running:
+            self.weather_api.track_lookups = True
+            self._task.start()
+
+    async def stop(self):
+        if self._task.running:
+            await self._task.stop()
+            self.weather_api.track_lookups = False
+            self.weather_api.lookup_counts.clear()
+
+    async def _run_and_log(self):
+        refreshed = await self.run_once()
+        if refreshed:
+            logger.info(f"Фоново обновлена погода для городов: {refreshed}")
+
+    def stats(self) -> Dict:
+        return {
+            "refreshed": self.refreshed,
+            "calls_last_hour": self.calls_last_hour,
+            "hourly_budget": self.hourly_budget,
+            "skipped_by_budget": self.skipped_by_budget,
+            "paused": self.paused,
+            "paused_by_quota": self.paused_by_quota,
+            "not_found": len(self._not_found)
+        }
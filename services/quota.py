@@ -0,0 +1,126 @@
+import json
+import calendar
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Dict, Optional
+from pathlib import Path
+
+from storage.writer import PeriodicSaver, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaManager:
+    """Учёт реальных запросов к внешнему API по дням и прогноз расхода месячной квоты."""
+
+    def __init__(
+            self,
+            name: str,
+            monthly_quota: int,
+            ledger_file: Optional[str] = None,
+            max_ttl_factor: float = 6,
+            save_interval: float = 60
+    ):
+        self.name = name
+        self.monthly_quota = monthly_quota
+        self.ledger_file = Path(ledger_file) if ledger_file else None
+        self.max_ttl_factor = max_ttl_factor
+        self.save_interval = save_interval
+
+        # Журнал вызовов: "ГГГГ-ММ-ДД" -> число запросов
+        self._days: Dict[str, int] = {}
+        self._saver: Optional[PeriodicSaver] = None
+        if self.ledger_file:
+            self._saver = PeriodicSaver(
+                f"журнала квоты {name}", self._serialize, partial(atomic_write_text, self.ledger_file), save_interval
+            )
+        self.rejected = 0
+
+        if self.ledger_file and self.ledger_file.exists():
+            try:
+                with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                    self._days = json.load(f)
+            except Exception as e:
+                logger.error(f"Ошибка загрузки журнала квоты {self.name}: {e}")
+
+    def record_call(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        self._days[today] = self._days.get(today, 0) + 1
+        if self._saver:
+            self._saver.mark_dirty()
+
+    @property
+    def today_calls(self) -> int:
+        return self._days.get(datetime.now().strftime('%Y-%m-%d'), 0)
+
+    @property
+    def month_calls(self) -> int:
+        month = datetime.now().strftime('%Y-%m-')
+        return sum(count for day, count in self._days.items() if day.startswith(month))
+
+    def projected_month_calls(self) -> int:
+        """Расход к концу месяца при сохранении текущего темпа."""
+        now = datetime.now()
+        days_in_month = calendar.monthrange(now.year, now.month)[1]
+        # Не меньше суток, чтобы первые часы месяца не давали завышенный прогноз
+        elapsed_days = max(1.0, now.day - 1 + (now.hour * 3600 + now.minute * 60 + now.second) / 86400)
+        return round(self.month_calls / elapsed_days * days_in_month)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.month_calls >= self.monthly_quota
+
+    @property
+    def over_budget(self) -> bool:
+        return self.projected_month_calls() > self.monthly_quota
+
+    @property
+    def ttl_factor(self) -> float:
+        """Во сколько раз удлинить кэш, чтобы темп запросов уложился в квоту."""
+        if not self.over_budget:
+            return 1.0
+        return min(self.max_ttl_factor, self.projected_month_calls() / max(1, self.monthly_quota))
+
+    def allow_call(self) -> bool:
+        if self.exhausted:
+            self.rejected += 1
+            return False
+        return True
+
+    def _prune(self):
+        # Храним только текущий и прошлый месяц
+        now = datetime.now()
+        previous = (now.replace(day=1).toordinal() - 1)
+        keep = (now.strftime('%Y-%m-'), datetime.fromordinal(previous).strftime('%Y-%m-'))
+        for day in [day for day in self._days if not day.startswith(keep)]:
+            del self._days[day]
+
+    def _serialize(self) -> str:
+        self._prune()
+        return json.dumps(self._days)
+
+    async def save(self):
+        if self._saver:
+            await self._saver.save()
+
+    async def start(self):
+        if self._saver:
+            self._saver.start()
+
+    async def close(self):
+        if self._saver:
+            await self._saver.close()
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "monthly_quota": self.monthly_quota,
+            "month_calls": self.month_calls,
+            "today_calls": self.today_calls,
+            "projected_month_calls": self.projected_month_calls(),
+            "over_budget": self.over_budget,
+            "exhausted": self.exhausted,
+            "ttl_factor": round(self.ttl_factor, 2),
+            "rejected": self.rejected
+        }
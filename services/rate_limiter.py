@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from services.cache import estimate_size, get_cache_registry
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "warned")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.warned = False
+
+
+class TokenBucketLimiter:
+    """Ограничение частоты по алгоритму маркерного ведра: rate жетонов в секунду, запас до burst.
+
+    Ведро, которое не трогали burst / rate секунд, заново полно и ничем не отличается от нового,
+    поэтому такие вёдра удаляются при периодической очистке без изменения поведения.
+    """
+
+    def __init__(
+            self,
+            name: str = "rate_limiter",
+            rate: float = 1.0,
+            burst: float = 3,
+            max_buckets: int = 100000,
+            sweep_interval: float = 60
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self.sweep_interval = sweep_interval
+
+        # Порядок — от давно не использованных к недавним, чтобы очистка шла с начала словаря
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._last_sweep = time.monotonic()
+
+        self.allowed = 0
+        self.dropped = 0
+        self.evicted = 0
+
+        get_cache_registry().register_store(name, self)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self):
+        self._buckets.clear()
+
+    def cache_stats(self) -> Dict:
+        return {"entries": len(self._buckets), "bytes": estimate_size(self._buckets)}
+
+    @property
+    def idle_ttl(self) -> float:
+        return self.burst / self.rate
+
+    def consume(self, key: Hashable, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            bucket.warned = False
+            self.allowed += 1
+            return True
+
+        self.dropped += 1
+        return False
+
+    def should_warn(self, key: Hashable) -> bool:
+        """Предупреждать о превышении один раз, пока пользователь снова не уложится в лимит."""
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.warned:
+            return False
+        bucket.warned = True
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        removed = 0
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self.idle_ttl:
+                break
+            del self._buckets[key]
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        total = self.allowed + self.dropped
+        return {
+            "buckets": len(self._buckets),
+            "max_buckets": self.max_buckets,
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "dropped": self.dropped,
+            "drop_ratio": round(self.dropped / total, 3) if total else 0.0,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,159 @@
+from typing import Optional
+
+from config.settings import (
+    WEATHERSTACK_API_KEY, WEATHERSTACK_BASE_URL, CAT_FACTS_BASE_URL, CACHE_TTL, WEATHER_STALE_TTL, WEATHER_CACHE_MAX_ENTRIES, WEATHER_CACHE_MAX_BYTES,
+    CAT_FACT_CACHE_TTL, CACHE_SWEEP_INTERVAL, WEATHER_CACHE_PERSIST, WEATHER_CACHE_DB, CITY_ALIASES_FILE,
+    WEATHER_NOT_FOUND_TTL, WEATHER_ERROR_TTL, UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RECOVERY_TIMEOUT,
+    UPSTREAM_MIN_TIMEOUT, WEATHER_MAX_TIMEOUT, CAT_FACTS_MAX_TIMEOUT,
+    WEATHER_MONTHLY_QUOTA, WEATHER_QUOTA_FILE, WEATHER_QUOTA_MAX_TTL_FACTOR,
+    THROTTLE_RATE, THROTTLE_BURST, THROTTLE_MAX_USERS, THROTTLE_SWEEP_INTERVAL,
+    THROTTLE_UPSTREAM_RATE, THROTTLE_UPSTREAM_BURST,
+    CAT_FACT_POOL_FILE, CAT_FACT_POOL_SIZE, CAT_FACT_PAGE_SIZE, CAT_FACT_POOL_REFRESH_INTERVAL, CAT_FACT_SEEN_MAX_USERS,
+    PREFETCH_ENABLED, PREFETCH_TOP_N, PREFETCH_HOURLY_BUDGET, PREFETCH_INTERVAL, PREFETCH_REFRESH_MARGIN
+)
+from services.api_client import WeatherstackAPI, CatFactsAPI
+from services.cat_fact_pool import CatFactPool
+from services.circuit_breaker import CircuitBreaker
+from services.city_index import CityAliasIndex
+from services.persistent_cache import PersistentWeatherCache
+from services.prefetcher import WeatherPrefetcher
+from services.quota import QuotaManager
+from services.rate_limiter import TokenBucketLimiter
+from storage.shared import get_storage
+
+_weather_api: Optional[WeatherstackAPI] = None
+_cat_api: Optional[CatFactsAPI] = None
+_prefetcher: Optional[WeatherPrefetcher] = None
+_cat_fact_pool: Optional[CatFactPool] = None
+_rate_limiter: Optional[TokenBucketLimiter] = None
+_upstream_limiter: Optional[TokenBucketLimiter] = None
+
+
+def _create_breaker(name: str, max_timeout: float) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=UPSTREAM_FAILURE_THRESHOLD,
+        recovery_timeout=UPSTREAM_RECOVERY_TIMEOUT,
+        min_timeout=UPSTREAM_MIN_TIMEOUT,
+        max_timeout=max_timeout
+    )
+
+
+def get_weather_api() -> Optional[WeatherstackAPI]:
+    global _weather_api
+    if _weather_api is None and WEATHERSTACK_API_KEY:
+        persistent_cache = None
+        if WEATHER_CACHE_PERSIST:
+            # Дисковые записи хранятся с учётом максимального продления свежести в режиме экономии квоты
+            persistent_cache = PersistentWeatherCache(
+                WEATHER_CACHE_DB,
+                max_age=CACHE_TTL * WEATHER_QUOTA_MAX_TTL_FACTOR + WEATHER_STALE_TTL
+            )
+
+        _weather_api = WeatherstackAPI(
+            WEATHERSTACK_API_KEY,
+            base_url=WEATHERSTACK_BASE_URL,
+            cache_ttl=CACHE_TTL,
+            stale_ttl=WEATHER_STALE_TTL,
+            cache_max_entries=WEATHER_CACHE_MAX_ENTRIES,
+            cache_max_bytes=WEATHER_CACHE_MAX_BYTES,
+            cache_sweep_interval=CACHE_SWEEP_INTERVAL,
+            persistent_cache=persistent_cache,
+            city_index=CityAliasIndex(CITY_ALIASES_FILE),
+            not_found_ttl=WEATHER_NOT_FOUND_TTL,
+            error_ttl=WEATHER_ERROR_TTL,
+            breaker=_create_breaker("weatherstack", WEATHER_MAX_TIMEOUT),
+            quota=QuotaManager(
+                "weatherstack",
+                WEATHER_MONTHLY_QUOTA,
+                ledger_file=WEATHER_QUOTA_FILE,
+                max_ttl_factor=WEATHER_QUOTA_MAX_TTL_FACTOR
+            ),
+            upstream_limiter=get_upstream_limiter()
+        )
+    return _weather_api
+
+
+def get_cat_api() -> CatFactsAPI:
+    global _cat_api
+    if _cat_api is None:
+        _cat_api = CatFactsAPI(
+            cache_ttl=CAT_FACT_CACHE_TTL,
+            breaker=_create_breaker("catfact", CAT_FACTS_MAX_TIMEOUT),
+            base_url=CAT_FACTS_BASE_URL
+        )
+    return _cat_api
+
+
+def get_cat_fact_pool() -> CatFactPool:
+    global _cat_fact_pool
+    if _cat_fact_pool is None:
+        _cat_fact_pool = CatFactPool(
+            get_cat_api(),
+            CAT_FACT_POOL_FILE,
+            max_size=CAT_FACT_POOL_SIZE,
+            page_size=CAT_FACT_PAGE_SIZE,
+            refill_interval=CAT_FACT_POOL_REFRESH_INTERVAL,
+            max_users=CAT_FACT_SEEN_MAX_USERS
+        )
+    return _cat_fact_pool
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketLimiter(
+            "rate_limiter",
+            rate=THROTTLE_RATE,
+            burst=THROTTLE_BURST,
+            max_buckets=THROTTLE_MAX_USERS,
+            sweep_interval=THROTTLE_SWEEP_INTERVAL
+        )
+    return _rate_limiter
+
+
+def get_upstream_limiter() -> TokenBucketLimiter:
+    global _upstream_limiter
+    if _upstream_limiter is None:
+        # Одно ведро на всех пользователей: защищает лимиты Weatherstack от суммарного всплеска промахов кэша
+        _upstream_limiter = TokenBucketLimiter("upstream_limiter", rate=THROTTLE_UPSTREAM_RATE, burst=THROTTLE_UPSTREAM_BURST, max_buckets=1)
+    return _upstream_limiter
+
+
+def get_prefetcher() -> Optional[WeatherPrefetcher]:
+    global _prefetcher
+    weather_api = get_weather_api()
+    if _prefetcher is None and PREFETCH_ENABLED and weather_api:
+        _prefetcher = WeatherPrefetcher(
+            weather_api,
+            get_storage(),
+            top_n=PREFETCH_TOP_N,
+            hourly_budget=PREFETCH_HOURLY_BUDGET,
+            interval=PREFETCH_INTERVAL,
+            refresh_margin=PREFETCH_REFRESH_MARGIN
+        )
+    return _prefetcher
+
+
+async def start_api_clients():
+    weather_api = get_weather_api()
+    if weather_api:
+        await weather_api.start()
+    await get_cat_api().cache.start()
+    await get_cat_fact_pool().start()
+
+    prefetcher = get_prefetcher()
+    if prefetcher:
+        await prefetcher.start()
+
+
+async def close_api_clients():
+    prefetcher = get_prefetcher()
+    if prefetcher:
+        await prefetcher.stop()
+
+    weather_api = get_weather_api()
+    if weather_api:
+        await weather_api.close()
+    await get_cat_fact_pool().close()
+    await get_cat_api().cache.stop()
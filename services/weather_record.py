@@ -0,0 +1,62 @@
+import sys
+from typing import Any, Dict, List, Optional
+
+
+class WeatherRecord:
+    """Компактная запись о погоде: только поля, которые показывает бот, без остального ответа Weatherstack."""
+
+    __slots__ = (
+        "name", "country", "region", "temperature", "feelslike", "descriptions", "humidity",
+        "wind_speed", "wind_dir", "pressure", "uv_index", "visibility", "fetched_at", "stale_age"
+    )
+
+    # Поля, сохраняемые на диск, в фиксированном порядке
+    PAYLOAD_FIELDS = __slots__[:-2]
+
+    def __init__(self, fetched_at: float, stale_age: Optional[float] = None, **fields: Any):
+        for field in self.PAYLOAD_FIELDS:
+            setattr(self, field, fields.get(field))
+        self.fetched_at = fetched_at
+        self.stale_age = stale_age
+
+    @classmethod
+    def from_response(cls, data: Dict, fetched_at: float) -> "WeatherRecord":
+        location = data.get('location') or {}
+        current = data.get('current') or {}
+        return cls(
+            fetched_at,
+            name=location.get('name', 'Неизвестный город'),
+            # Страна, регион и направление ветра повторяются у тысяч записей, храним одну копию строки
+            country=sys.intern(location.get('country') or ''),
+            region=sys.intern(location.get('region') or ''),
+            temperature=current.get('temperature', 'N/A'),
+            feelslike=current.get('feelslike', 'N/A'),
+            descriptions=tuple(current.get('weather_descriptions') or ('Нет описания',)),
+            humidity=current.get('humidity', 'N/A'),
+            wind_speed=current.get('wind_speed', 'N/A'),
+            wind_dir=sys.intern(str(current.get('wind_dir', 'N/A'))),
+            pressure=current.get('pressure', 'N/A'),
+            uv_index=current.get('uv_index', 'N/A'),
+            visibility=current.get('visibility', 'N/A')
+        )
+
+    @classmethod
+    def from_payload(cls, payload: Any, fetched_at: float) -> "WeatherRecord":
+        # Записи, сохранённые до появления компактного формата, содержат полный ответ API
+        if isinstance(payload, dict):
+            return cls.from_response(payload, fetched_at)
+
+        fields = dict(zip(cls.PAYLOAD_FIELDS, payload))
+        fields['descriptions'] = tuple(fields.get('descriptions') or ())
+        for field in ('country', 'region', 'wind_dir'):
+            fields[field] = sys.intern(str(fields.get(field) or ''))
+        return cls(fetched_at, **fields)
+
+    def to_payload(self) -> List[Any]:
+        return [getattr(self, field) for field in self.PAYLOAD_FIELDS]
+
+    def with_stale_age(self, stale_age: float) -> "WeatherRecord":
+        record = WeatherRecord(self.fetched_at, stale_age)
+        for field in self.PAYLOAD_FIELDS:
+            setattr(record, field, getattr(self, field))
+        return record
@@ -0,0 +1,48 @@
+from typing import Dict, Optional, Tuple
+
+
+class ActivityAccumulator:
+    """Копит инкременты активности пользователей между записями в хранилище."""
+
+    def __init__(self, max_events: int = 500):
+        self.max_events = max_events
+        self._pending: Dict[int, list] = {}
+        self.pending_events = 0
+
+    def record(self, user_id: int, timestamp: str) -> bool:
+        entry = self._pending.get(user_id)
+        if entry is None:
+            self._pending[user_id] = [1, timestamp]
+        else:
+            entry[0] += 1
+            entry[1] = timestamp
+
+        self.pending_events += 1
+        return self.pending_events >= self.max_events
+
+    def drain(self) -> Dict[int, Tuple[int, str]]:
+        batch = {user_id: (count, timestamp) for user_id, (count, timestamp) in self._pending.items()}
+        self._pending = {}
+        self.pending_events = 0
+        return batch
+
+    def merge_user(self, user_id: int, info: Optional[Dict]) -> Optional[Dict]:
+        entry = self._pending.get(user_id)
+        if info is None or entry is None:
+            return info
+
+        merged = dict(info)
+        merged["request_count"] = merged.get("request_count", 0) + entry[0]
+        merged["last_activity"] = entry[1]
+        return merged
+
+    def merge_users(self, users: Dict[str, Dict]) -> Dict[str, Dict]:
+        if not self._pending:
+            return users
+
+        merged = dict(users)
+        for user_id in self._pending:
+            user_str = str(user_id)
+            if user_str in merged:
+                merged[user_str] = self.merge_user(user_id, merged[user_str])
+        return merged
@@ -0,0 +1,138 @@
+import heapq
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from typing import Dict, Iterable, List, Tuple
+from datetime import datetime, timedelta
+
+
+def parse_timestamp(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime(2020, 1, 1)
+
+
+class AdminAggregates:
+    """Агрегаты для админ-панели, обновляемые при каждой записи, а не пересчитываемые по всем пользователям."""
+
+    def __init__(
+            self,
+            recent_limit: int = 10,
+            bucket_seconds: int = 60,
+            max_window: timedelta = timedelta(days=7),
+            top_size: int = 20
+    ):
+        self.recent_limit = recent_limit
+        self.top_size = top_size
+        self.bucket_seconds = bucket_seconds
+        self.max_window = max_window
+
+        # Пользователи в порядке последней активности: самые свежие в конце
+        self._last_activity: "OrderedDict[int, datetime]" = OrderedDict()
+        # Число пользователей, чья последняя активность попала в данный интервал
+        self._activity_buckets: Dict[int, int] = {}
+        self._registrations: deque = deque(maxlen=recent_limit)
+        self.city_counts: Counter = Counter()
+        self.total_favorites = 0
+        # top_size самых популярных городов; пересчитывается полностью, только когда из него удаляют город
+        self._top: Dict[str, int] = {}
+        self._top_valid = False
+
+    @property
+    def user_count(self) -> int:
+        return len(self._last_activity)
+
+    def _bucket(self, timestamp: datetime) -> int:
+        return int(timestamp.timestamp()) // self.bucket_seconds
+
+    def load(self, users: Iterable[Tuple[int, datetime, datetime]], city_counts: Dict[str, int]):
+        """Первичное заполнение из хранилища: users — кортежи (user_id, first_seen, last_activity)."""
+        users = list(users)
+
+        self._last_activity.clear()
+        self._activity_buckets.clear()
+        for user_id, _, last_activity in sorted(users, key=lambda user: user[2]):
+            self._last_activity[user_id] = last_activity
+            bucket = self._bucket(last_activity)
+            self._activity_buckets[bucket] = self._activity_buckets.get(bucket, 0) + 1
+
+        self._registrations.clear()
+        for user_id, _, _ in reversed(heapq.nlargest(self.recent_limit, users, key=lambda user: user[1])):
+            self._registrations.append(user_id)
+
+        self.city_counts = Counter({city: count for city, count in city_counts.items() if count > 0})
+        self.total_favorites = sum(self.city_counts.values())
+        self._top_valid = False
+
+    def add_user(self, user_id: int, timestamp: datetime):
+        if user_id in self._last_activity:
+            return
+        self._registrations.append(user_id)
+        self._last_activity[user_id] = timestamp
+        bucket = self._bucket(timestamp)
+        self._activity_buckets[bucket] = self._activity_buckets.get(bucket, 0) + 1
+
+    def touch(self, user_id: int, timestamp: datetime):
+        previous = self._last_activity.get(user_id)
+        if previous is None:
+            return
+
+        old_bucket = self._bucket(previous)
+        if old_bucket in self._activity_buckets:
+            self._activity_buckets[old_bucket] -= 1
+            if not self._activity_buckets[old_bucket]:
+                del self._activity_buckets[old_bucket]
+
+        new_bucket = self._bucket(timestamp)
+        self._activity_buckets[new_bucket] = self._activity_buckets.get(new_bucket, 0) + 1
+        self._last_activity[user_id] = timestamp
+        self._last_activity.move_to_end(user_id)
+
+    def add_city(self, city: str):
+        self.city_counts[city] += 1
+        self.total_favorites += 1
+        if not self._top_valid:
+            return
+
+        count = self.city_counts[city]
+        if city in self._top or len(self._top) < self.top_size:
+            self._top[city] = count
+            return
+
+        weakest = min(self._top, key=self._top.get)
+        if count > self._top[weakest]:
+            del self._top[weakest]
+            self._top[city] = count
+
+    def remove_city(self, city: str):
+        if self.city_counts[city] <= 1:
+            self.city_counts.pop(city, None)
+        else:
+            self.city_counts[city] -= 1
+        self.total_favorites = max(0, self.total_favorites - 1)
+        # Уменьшившийся город мог уступить место тому, что за пределами топа
+        if city in self._top:
+            self._top_valid = False
+
+    def active_count(self, window: timedelta) -> int:
+        now = datetime.now()
+        oldest = self._bucket(now - self.max_window)
+        for bucket in [bucket for bucket in self._activity_buckets if bucket < oldest]:
+            del self._activity_buckets[bucket]
+
+        cutoff = self._bucket(now - window)
+        return sum(count for bucket, count in self._activity_buckets.items() if bucket >= cutoff)
+
+    def top_cities(self, limit: int = 5) -> List[Tuple[str, int]]:
+        if limit > self.top_size:
+            return self.city_counts.most_common(limit)
+        if not self._top_valid:
+            self._top = dict(self.city_counts.most_common(self.top_size))
+            self._top_valid = True
+        return sorted(self._top.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def recent_registrations(self, limit: int = 10) -> List[int]:
+        return list(islice(reversed(self._registrations), limit))
+
+    def recent_activity(self, limit: int = 10) -> List[Tuple[int, datetime]]:
+        return list(islice(reversed(self._last_activity.items()), limit))
@@ -0,0 +1,139 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime
+
+from storage.activity import ActivityAccumulator
+from storage.aggregates import AdminAggregates
+from storage.writer import PeriodicTask, SerialWriter
+
+logger = logging.getLogger(__name__)
+
+
+class BaseStorage(ABC):
+    """Общий интерфейс хранилищ пользовательских данных."""
+
+    def __init__(self, activity_flush_interval: float = 10.0, activity_flush_events: int = 500):
+        self.activity = ActivityAccumulator(activity_flush_events)
+        self.activity_flush_interval = activity_flush_interval
+        self._activity_task = PeriodicTask("запись активности пользователей", self.flush_activity, activity_flush_interval)
+        self.writer = SerialWriter(type(self).__name__)
+        self._banned_ids: Set[int] = set()
+        self.aggregates = AdminAggregates()
+
+    async def start(self):
+        await self.writer.start()
+        await self._start_backend()
+        self._activity_task.start()
+
+    async def close(self):
+        await self._activity_task.stop()
+        await self.flush_activity()
+        await self._flush_backend()
+        await self.writer.stop()
+        await self._close_backend()
+
+    async def _start_backend(self):
+        pass
+
+    async def _flush_backend(self):
+        pass
+
+    async def _close_backend(self):
+        pass
+
+    def is_banned(self, user_id: int) -> bool:
+        return user_id in self._banned_ids
+
+    @property
+    def banned_count(self) -> int:
+        return len(self._banned_ids)
+
+    async def is_user_banned(self, user_id: int) -> bool:
+        return self.is_banned(user_id)
+
+    def get_write_metrics(self) -> Dict:
+        return self.writer.metrics()
+
+    async def update_user_activity(self, user_id: int):
+        now = datetime.now()
+        self.aggregates.touch(user_id, now)
+        if self.activity.record(user_id, str(now)):
+            await self.flush_activity()
+
+    async def flush_activity(self):
+        batch = self.activity.drain()
+        if not batch:
+            return
+
+        try:
+            await self._apply_activity(batch)
+        except Exception as e:
+            logger.error(f"Ошибка записи активности пользователей: {e}")
+
+    async def get_user_info(self, user_id: int) -> Optional[Dict]:
+        return self.activity.merge_user(user_id, await self._get_user_info(user_id))
+
+    async def get_users(self) -> Dict[str, Dict]:
+        return self.activity.merge_users(await self._get_users())
+
+    async def get_statistics(self) -> Dict:
+        statistics = await self._get_statistics()
+        statistics["total_requests"] = statistics.get("total_requests", 0) + self.activity.pending_events
+        return statistics
+
+    @abstractmethod
+    async def _apply_activity(self, batch: Dict[int, Tuple[int, str]]):
+        ...
+
+    @abstractmethod
+    async def add_user(self, user_id: int, username: str = None):
+        ...
+
+    @abstractmethod
+    async def add_favorite(self, user_id: int, item: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_favorites(self, user_id: int) -> List[str]:
+        ...
+
+    @abstractmethod
+    async def remove_favorite(self, user_id: int, item: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_all_favorites(self) -> Dict[str, List[str]]:
+        ...
+
+    @abstractmethod
+    async def _get_statistics(self) -> Dict:
+        ...
+
+    @abstractmethod
+    async def get_all_users(self) -> List[int]:
+        ...
+
+    @abstractmethod
+    async def _get_users(self) -> Dict[str, Dict]:
+        ...
+
+    @abstractmethod
+    async def _get_user_info(self, user_id: int) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def ban_user(self, user_id: int, reason: str = "Нарушение правил", admin_id: int = None) -> bool:
+        ...
+
+    @abstractmethod
+    async def unban_user(self, user_id: int, admin_id: int = None) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_ban_info(self, user_id: int) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def get_banned_users(self) -> Dict[str, Dict]:
+        ...
@@ -1,23 +1,73 @@
 import json
-import aiofiles
+import time
 import logging
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+from storage.aggregates import parse_timestamp
+from storage.base import BaseStorage
+from storage.writer import PeriodicTask, atomic_write_text, append_text
+
 logger = logging.getLogger(__name__)
 
 
-class JSONStorage:
-    def __init__(self, file_path: str = "storage/user_data.json"):
+class JSONStorage(BaseStorage):
+    def __init__(
+            self,
+            file_path: str = "storage/user_data.json",
+            flush_interval: float = 5.0,
+            journal: bool = False,
+            journal_max_bytes: int = 1024 * 1024,
+            snapshot_interval: float = 600.0,
+            **activity_options
+    ):
+        super().__init__(**activity_options)
         self.file_path = Path(file_path)
         self.file_path.parent.mkdir(exist_ok=True)
+        self.journal_path = self.file_path.with_name(self.file_path.name + ".journal")
+        self.flush_interval = flush_interval
+        self.journal = journal
+        self.journal_max_bytes = journal_max_bytes
+        self.snapshot_interval = snapshot_interval
 
         if not self.file_path.exists():
             self._create_empty_storage()
 
+        self._data = self._read_file()
+        self._banned_ids = {int(user_id) for user_id in self._data["banned_users"]}
+        self._dirty = False
+        self._flush_task = PeriodicTask("запись хранилища на диск", self.flush, flush_interval)
+
+        self._seq = self._data.get("journal_seq", 0)
+        self._pending_records: List[Dict[str, Any]] = []
+        self._journal_size = 0
+        self._last_snapshot = time.monotonic()
+
+        if self.journal:
+            self._replay_journal()
+
+        self._load_aggregates()
+
+    def _load_aggregates(self):
+        users = [
+            (int(user_id), parse_timestamp(info.get("first_seen")), parse_timestamp(info.get("last_activity")))
+            for user_id, info in self._data["users"].items()
+        ]
+        city_counts = {}
+        for cities in self._data["favorites"].values():
+            for city in cities:
+                city_counts[city] = city_counts.get(city, 0) + 1
+        self.aggregates.load(users, city_counts)
+
     def _create_empty_storage(self):
-        initial_data = {
+        initial_data = self._empty_data()
+        atomic_write_text(self.file_path, json.dumps(initial_data, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _empty_data() -> Dict:
+        return {
             "users": {},
             "favorites": {},
             "banned_users": {},
@@ -27,129 +77,285 @@ class JSONStorage:
                 "bot_started": str(datetime.now())
             }
         }
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(initial_data, f, ensure_ascii=False, indent=2)
 
-    async def load_data(self) -> Dict:
+    def _read_file(self) -> Dict:
         try:
-            async with aiofiles.open(self.file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                data = json.loads(content)
-
-                if "banned_users" not in data:
-                    data["banned_users"] = {}
-
-                return data
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         except Exception as e:
             logger.error(f"Ошибка загрузки данных: {e}")
+            # Повреждённый файл не затираем, а откладываем в сторону для ручного восстановления
+            backup_path = self.file_path.with_name(f"{self.file_path.name}.corrupt-{int(time.time())}")
+            self.file_path.rename(backup_path)
+            logger.error(f"Повреждённый файл данных сохранён как {backup_path}")
             self._create_empty_storage()
-            return await self.load_data()
+            data = self._empty_data()
 
-    async def save_data(self, data: Dict):
-        try:
-            async with aiofiles.open(self.file_path, 'w', encoding='utf-8') as f:
-                content = json.dumps(data, ensure_ascii=False, indent=2)
-                await f.write(content)
-        except Exception as e:
-            logger.error(f"Ошибка сохранения данных: {e}")
+        if "banned_users" not in data:
+            data["banned_users"] = {}
 
-    async def add_user(self, user_id: int, username: str = None):
-        data = await self.load_data()
+        return data
+
+    def _replay_journal(self):
+        if not self.journal_path.exists():
+            return
+
+        replayed = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Пропущена повреждённая запись в журнале хранилища")
+                    continue
+
+                if record.get("seq", 0) <= self._seq:
+                    continue
+
+                self._apply(record)
+                self._seq = record["seq"]
+                replayed += 1
+
+        self._journal_size = self.journal_path.stat().st_size
+        if replayed:
+            self._dirty = True
+            logger.info(f"Из журнала восстановлено {replayed} изменений")
+
+    def _apply(self, record: Dict[str, Any]) -> bool:
+        # Записи пользователей и списки избранного заменяются целиком, а не изменяются на месте:
+        # снимок, который сериализуется в потоке записи, держит ссылки на прежние объекты
+        data = self._data
+        op = record["op"]
+        user_str = str(record["user_id"])
 
-        if str(user_id) not in data["users"]:
-            data["users"][str(user_id)] = {
-                "username": username,
-                "first_seen": str(datetime.now()),
-                "last_activity": str(datetime.now()),
+        if op == "add_user":
+            if user_str in data["users"]:
+                return False
+            data["users"][user_str] = {
+                "username": record.get("username"),
+                "first_seen": record["ts"],
+                "last_activity": record["ts"],
                 "request_count": 0
             }
             data["statistics"]["total_users"] += 1
-            await self.save_data(data)
-            logger.info(f"Добавлен новый пользователь: {user_id}")
+            return True
 
-    async def update_user_activity(self, user_id: int):
-        data = await self.load_data()
-        user_str = str(user_id)
+        if op == "activity":
+            if user_str not in data["users"]:
+                return False
+            count = record.get("count", 1)
+            info = data["users"][user_str]
+            data["users"][user_str] = {**info, "last_activity": record["ts"], "request_count": info["request_count"] + count}
+            data["statistics"]["total_requests"] += count
+            return True
 
-        if user_str in data["users"]:
-            data["users"][user_str]["last_activity"] = str(datetime.now())
-            data["users"][user_str]["request_count"] += 1
-            data["statistics"]["total_requests"] += 1
-            await self.save_data(data)
+        if op == "add_favorite":
+            favorites = data["favorites"].get(user_str, [])
+            if record["city"] in favorites:
+                return False
+            data["favorites"][user_str] = favorites + [record["city"]]
+            return True
 
-    async def add_favorite(self, user_id: int, item: str):
-        data = await self.load_data()
-        user_str = str(user_id)
+        if op == "remove_favorite":
+            favorites = data["favorites"].get(user_str)
+            if not favorites or record["city"] not in favorites:
+                return False
+            data["favorites"][user_str] = [city for city in favorites if city != record["city"]]
+            return True
 
-        if user_str not in data["favorites"]:
-            data["favorites"][user_str] = []
+        if op == "ban":
+            if user_str in data["banned_users"]:
+                return False
+            data["banned_users"][user_str] = {
+                "reason": record.get("reason"),
+                "banned_at": record["ts"],
+                "banned_by": record.get("banned_by")
+            }
+            self._banned_ids.add(int(user_str))
+            return True
 
-        if item not in data["favorites"][user_str]:
-            data["favorites"][user_str].append(item)
-            await self.save_data(data)
+        if op == "unban":
+            if user_str not in data["banned_users"]:
+                return False
+            del data["banned_users"][user_str]
+            self._banned_ids.discard(int(user_str))
             return True
+
+        logger.warning(f"Неизвестная операция в журнале хранилища: {op}")
         return False
 
+    def _commit(self, op: str, user_id: int, **fields) -> bool:
+        record = {"op": op, "user_id": user_id, "ts": str(datetime.now()), **fields}
+
+        if not self._apply(record):
+            return False
+
+        if op == "add_user":
+            self.aggregates.add_user(user_id, parse_timestamp(record["ts"]))
+        elif op == "add_favorite":
+            self.aggregates.add_city(fields["city"])
+        elif op == "remove_favorite":
+            self.aggregates.remove_city(fields["city"])
+
+        if self.journal:
+            self._seq += 1
+            record["seq"] = self._seq
+            self._pending_records.append(record)
+        else:
+            self._dirty = True
+        return True
+
+    async def _start_backend(self):
+        if not self._flush_task.running:
+            self._flush_task.start()
+            mode = "журнал" if self.journal else "периодический снимок"
+            logger.info(f"Хранилище загружено в память ({mode}), сброс на диск каждые {self.flush_interval} с")
+
+    async def _flush_backend(self):
+        await self._flush_task.stop()
+
+        if self.journal:
+            await self.compact()
+        else:
+            await self.flush()
+
+    async def flush(self):
+        if self.journal:
+            await self._append_journal()
+            if self._needs_compaction():
+                await self.compact()
+            return
+
+        if not self._dirty:
+            return
+
+        self._dirty = False
+        try:
+            await self._write_snapshot(self._snapshot())
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Ошибка сохранения данных: {e}")
+
+    def _needs_compaction(self) -> bool:
+        if self._dirty:
+            return True
+        if self._journal_size >= self.journal_max_bytes:
+            return True
+        return self._journal_size > 0 and time.monotonic() - self._last_snapshot >= self.snapshot_interval
+
+    def _snapshot(self) -> Dict:
+        """Копия данных для сериализации в потоке записи. Вложенные записи не меняются на месте (см. _apply),
+        поэтому достаточно скопировать словари верхнего уровня."""
+        data = self._data
+        if self.journal:
+            data["journal_seq"] = self._seq
+
+        snapshot = {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+        return snapshot
+
+    @staticmethod
+    def _encode_snapshot(snapshot: Dict, chunk_size: int = 1000) -> str:
+        """JSON без отступов, большие словари кодируются частями: json.dumps не отпускает GIL,
+        и одним вызовом на всю базу поток записи остановил бы цикл событий на время сериализации."""
+        parts = []
+        for key, value in snapshot.items():
+            if isinstance(value, dict) and len(value) > chunk_size:
+                items = iter(value.items())
+                chunks = []
+                while True:
+                    chunk = dict(islice(items, chunk_size))
+                    if not chunk:
+                        break
+                    chunks.append(json.dumps(chunk, ensure_ascii=False)[1:-1])
+                encoded = "{" + ", ".join(chunks) + "}"
+            else:
+                encoded = json.dumps(value, ensure_ascii=False)
+            parts.append(f"{json.dumps(key, ensure_ascii=False)}: {encoded}")
+        return "{" + ", ".join(parts) + "}"
+
+    @classmethod
+    def _dump_to_file(cls, path: Path, snapshot: Dict):
+        atomic_write_text(path, cls._encode_snapshot(snapshot))
+
+    async def _write_snapshot(self, snapshot: Dict):
+        await self.writer.submit(self._dump_to_file, self.file_path, snapshot)
+
+    async def _append_journal(self):
+        if not self._pending_records:
+            return
+
+        records, self._pending_records = self._pending_records, []
+        chunk = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        try:
+            await self.writer.submit(append_text, self.journal_path, chunk)
+            self._journal_size += len(chunk.encode('utf-8'))
+        except Exception as e:
+            self._pending_records = records + self._pending_records
+            logger.error(f"Ошибка записи журнала хранилища: {e}")
+
+    async def compact(self):
+        """Переписывает снимок целиком и обнуляет журнал."""
+        snapshot = self._snapshot()
+        # Записи, ещё не попавшие в журнал, уже учтены в снимке
+        self._pending_records = []
+        self._dirty = False
+
+        try:
+            await self._write_snapshot(snapshot)
+            await self.writer.submit(atomic_write_text, self.journal_path, "")
+            self._journal_size = 0
+            self._last_snapshot = time.monotonic()
+            logger.info("Снимок хранилища перезаписан, журнал очищен")
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Ошибка сохранения данных: {e}")
+
+    async def add_user(self, user_id: int, username: str = None):
+        if self._commit("add_user", user_id, username=username):
+            logger.info(f"Добавлен новый пользователь: {user_id}")
+
+    async def _apply_activity(self, batch: Dict[int, Tuple[int, str]]):
+        for user_id, (count, timestamp) in batch.items():
+            self._commit("activity", user_id, count=count, ts=timestamp)
+
+    async def add_favorite(self, user_id: int, item: str):
+        return self._commit("add_favorite", user_id, city=item)
+
     async def get_favorites(self, user_id: int) -> List[str]:
-        data = await self.load_data()
-        return data["favorites"].get(str(user_id), [])
+        return list(self._data["favorites"].get(str(user_id), []))
 
     async def remove_favorite(self, user_id: int, item: str) -> bool:
-        data = await self.load_data()
-        user_str = str(user_id)
+        return self._commit("remove_favorite", user_id, city=item)
 
-        if user_str in data["favorites"] and item in data["favorites"][user_str]:
-            data["favorites"][user_str].remove(item)
-            await self.save_data(data)
-            return True
-        return False
+    async def get_all_favorites(self) -> Dict[str, List[str]]:
+        return self._data.get("favorites", {})
 
-    async def get_statistics(self) -> Dict:
-        data = await self.load_data()
-        return data.get("statistics", {})
+    async def _get_statistics(self) -> Dict:
+        return dict(self._data.get("statistics", {}))
 
     async def get_all_users(self) -> List[int]:
-        data = await self.load_data()
-        return [int(user_id) for user_id in data["users"].keys()]
+        return [int(user_id) for user_id in self._data["users"].keys()]
 
-    async def ban_user(self, user_id: int, reason: str = "Нарушение правил", admin_id: int = None) -> bool:
-        data = await self.load_data()
-        user_str = str(user_id)
+    async def _get_users(self) -> Dict[str, Dict]:
+        return self._data.get("users", {})
 
-        if user_str not in data["banned_users"]:
-            data["banned_users"][user_str] = {
-                "reason": reason,
-                "banned_at": str(datetime.now()),
-                "banned_by": admin_id
-            }
-            await self.save_data(data)
+    async def ban_user(self, user_id: int, reason: str = "Нарушение правил", admin_id: int = None) -> bool:
+        if self._commit("ban", user_id, reason=reason, banned_by=admin_id):
             logger.info(f"Пользователь {user_id} заблокирован админом {admin_id}. Причина: {reason}")
             return True
         return False
 
     async def unban_user(self, user_id: int, admin_id: int = None) -> bool:
-        data = await self.load_data()
-        user_str = str(user_id)
-
-        if user_str in data["banned_users"]:
-            del data["banned_users"][user_str]
-            await self.save_data(data)
+        if self._commit("unban", user_id):
             logger.info(f"Пользователь {user_id} разблокирован админом {admin_id}")
             return True
         return False
 
-    async def is_user_banned(self, user_id: int) -> bool:
-        data = await self.load_data()
-        return str(user_id) in data.get("banned_users", {})
-
     async def get_ban_info(self, user_id: int) -> Optional[Dict]:
-        data = await self.load_data()
-        return data.get("banned_users", {}).get(str(user_id))
+        return self._data.get("banned_users", {}).get(str(user_id))
 
     async def get_banned_users(self) -> Dict:
-        data = await self.load_data()
-        return data.get("banned_users", {})
+        return self._data.get("banned_users", {})
 
-    async def get_user_info(self, user_id: int) -> Optional[Dict]:
-        data = await self.load_data()
-        return data.get("users", {}).get(str(user_id))
\ No newline at end of file
+    async def _get_user_info(self, user_id: int) -> Optional[Dict]:
+        return self._data.get("users", {}).get(str(user_id))
@@ -0,0 +1,23 @@
+import argparse
+import logging
+
+from storage.sqlite_storage import SQLiteStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос user_data.json в SQLite")
+    parser.add_argument("--json", default="storage/user_data.json", help="исходный JSON файл")
+    parser.add_argument("--db", default="storage/user_data.db", help="файл базы SQLite")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    storage = SQLiteStorage(args.db)
+    if storage.migrate_from_json(args.json):
+        print(f"Готово: {args.json} -> {args.db}")
+    else:
+        print("Миграция не выполнена: база уже содержит данные или JSON файл не найден")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from typing import Optional
+
+from config.settings import (
+    STORAGE_BACKEND, STORAGE_FILE, STORAGE_FLUSH_INTERVAL, SQLITE_DB_FILE,
+    STORAGE_JOURNAL, STORAGE_JOURNAL_MAX_BYTES, STORAGE_SNAPSHOT_INTERVAL,
+    ACTIVITY_FLUSH_INTERVAL, ACTIVITY_FLUSH_EVENTS
+)
+from storage.base import BaseStorage
+from storage.json_storage import JSONStorage
+from storage.sqlite_storage import SQLiteStorage
+
+_storage: Optional[BaseStorage] = None
+
+
+def _create_storage() -> BaseStorage:
+    activity_options = {
+        "activity_flush_interval": ACTIVITY_FLUSH_INTERVAL,
+        "activity_flush_events": ACTIVITY_FLUSH_EVENTS
+    }
+
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteStorage(SQLITE_DB_FILE, migrate_from=STORAGE_FILE, **activity_options)
+    if STORAGE_BACKEND == "json":
+        return JSONStorage(
+            STORAGE_FILE,
+            flush_interval=STORAGE_FLUSH_INTERVAL,
+            journal=STORAGE_JOURNAL,
+            journal_max_bytes=STORAGE_JOURNAL_MAX_BYTES,
+            snapshot_interval=STORAGE_SNAPSHOT_INTERVAL,
+            **activity_options
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+def get_storage() -> BaseStorage:
+    global _storage
+    if _storage is None:
+        _storage = _create_storage()
+    return _storage
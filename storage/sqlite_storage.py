@@ -0,0 +1,287 @@
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from datetime import datetime
+
+from storage.aggregates import parse_timestamp
+from storage.base import BaseStorage
+from storage.json_storage import JSONStorage
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_seen TEXT NOT NULL,
+    last_activity TEXT NOT NULL,
+    request_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity);
+CREATE INDEX IF NOT EXISTS idx_users_first_seen ON users(first_seen);
+
+CREATE TABLE IF NOT EXISTS favorites (
+    user_id INTEGER NOT NULL,
+    city TEXT NOT NULL,
+    PRIMARY KEY (user_id, city)
+);
+CREATE INDEX IF NOT EXISTS idx_favorites_city ON favorites(city);
+
+CREATE TABLE IF NOT EXISTS banned_users (
+    user_id INTEGER PRIMARY KEY,
+    reason TEXT,
+    banned_at TEXT NOT NULL,
+    banned_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS statistics (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, db_path: str = "storage/user_data.db", migrate_from: Optional[str] = None, **activity_options):
+        super().__init__(**activity_options)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO statistics (key, value) VALUES ('total_users', 0), ('total_requests', 0)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO statistics (key, value) VALUES ('bot_started', ?)", (str(datetime.now()),)
+        )
+        self._conn.commit()
+
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+
+        self._banned_ids = {row["user_id"] for row in self._conn.execute("SELECT user_id FROM banned_users")}
+        self.aggregates.load(
+            (
+                (row["user_id"], parse_timestamp(row["first_seen"]), parse_timestamp(row["last_activity"]))
+                for row in self._conn.execute("SELECT user_id, first_seen, last_activity FROM users")
+            ),
+            {
+                row["city"]: row["total"]
+                for row in self._conn.execute("SELECT city, COUNT(*) AS total FROM favorites GROUP BY city")
+            }
+        )
+
+    def migrate_from_json(self, json_path: str) -> bool:
+        """Однократный перенос данных из user_data.json в пустую базу вместе с изменениями из его журнала."""
+        path = Path(json_path)
+        if not path.exists():
+            return False
+
+        with self._lock:
+            if self._conn.execute("SELECT value FROM statistics WHERE key = 'migrated_from'").fetchone():
+                return False
+            if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                return False
+
+            # Снимок читается через JSONStorage: после сбоя часть изменений есть только в журнале
+            data = JSONStorage(str(path), journal=True)._data
+
+            users = data.get("users", {})
+            statistics = data.get("statistics", {})
+            now = str(datetime.now())
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO users (user_id, username, first_seen, last_activity, request_count) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            int(user_id),
+                            info.get("username"),
+                            info.get("first_seen", now),
+                            info.get("last_activity", now),
+                            info.get("request_count", 0)
+                        )
+                        for user_id, info in users.items()
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO favorites (user_id, city) VALUES (?, ?)",
+                    [
+                        (int(user_id), city)
+                        for user_id, cities in data.get("favorites", {}).items()
+                        for city in cities
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO banned_users (user_id, reason, banned_at, banned_by) VALUES (?, ?, ?, ?)",
+                    [
+                        (int(user_id), info.get("reason"), info.get("banned_at", now), info.get("banned_by"))
+                        for user_id, info in data.get("banned_users", {}).items()
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO statistics (key, value) VALUES (?, ?)",
+                    [
+                        ("total_users", statistics.get("total_users", len(users))),
+                        ("total_requests", statistics.get("total_requests", 0)),
+                        ("bot_started", statistics.get("bot_started", now)),
+                        ("migrated_from", str(path))
+                    ]
+                )
+
+        logger.info(f"Данные перенесены из {path} в {self.db_path}: {len(users)} пользователей")
+        return True
+
+    def _call(self, func, *args):
+        with self._lock:
+            return func(*args)
+
+    async def _run(self, func, *args):
+        return await asyncio.to_thread(self._call, func, *args)
+
+    async def _write(self, func, *args):
+        return await self.writer.submit(self._call, func, *args)
+
+    async def _close_backend(self):
+        await self._run(self._conn.close)
+
+    def _add_user(self, user_id: int, username: Optional[str], timestamp: str) -> bool:
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, username, first_seen, last_activity, request_count) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (user_id, username, timestamp, timestamp)
+            )
+            if cursor.rowcount:
+                self._conn.execute("UPDATE statistics SET value = value + 1 WHERE key = 'total_users'")
+        return cursor.rowcount > 0
+
+    async def add_user(self, user_id: int, username: str = None):
+        now = datetime.now()
+        if await self._write(self._add_user, user_id, username, str(now)):
+            self.aggregates.add_user(user_id, now)
+            logger.info(f"Добавлен новый пользователь: {user_id}")
+
+    def _write_activity(self, batch: Dict[int, Tuple[int, str]]):
+        applied = 0
+        with self._conn:
+            for user_id, (count, timestamp) in batch.items():
+                cursor = self._conn.execute(
+                    "UPDATE users SET last_activity = ?, request_count = request_count + ? WHERE user_id = ?",
+                    (timestamp, count, user_id)
+                )
+                if cursor.rowcount:
+                    applied += count
+            self._conn.execute(
+                "UPDATE statistics SET value = value + ? WHERE key = 'total_requests'", (applied,)
+            )
+
+    async def _apply_activity(self, batch: Dict[int, Tuple[int, str]]):
+        await self._write(self._write_activity, batch)
+
+    def _execute(self, query: str, params: tuple = ()) -> int:
+        with self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def _fetchall(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return self._conn.execute(query, params).fetchall()
+
+    def _fetchone(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        return self._conn.execute(query, params).fetchone()
+
+    async def add_favorite(self, user_id: int, item: str) -> bool:
+        rowcount = await self._write(
+            self._execute, "INSERT OR IGNORE INTO favorites (user_id, city) VALUES (?, ?)", (user_id, item)
+        )
+        if rowcount:
+            self.aggregates.add_city(item)
+        return rowcount > 0
+
+    async def get_favorites(self, user_id: int) -> List[str]:
+        rows = await self._run(
+            self._fetchall, "SELECT city FROM favorites WHERE user_id = ? ORDER BY rowid", (user_id,)
+        )
+        return [row["city"] for row in rows]
+
+    async def remove_favorite(self, user_id: int, item: str) -> bool:
+        rowcount = await self._write(
+            self._execute, "DELETE FROM favorites WHERE user_id = ? AND city = ?", (user_id, item)
+        )
+        if rowcount:
+            self.aggregates.remove_city(item)
+        return rowcount > 0
+
+    async def get_all_favorites(self) -> Dict[str, List[str]]:
+        rows = await self._run(self._fetchall, "SELECT user_id, city FROM favorites ORDER BY rowid")
+        favorites = {}
+        for row in rows:
+            favorites.setdefault(str(row["user_id"]), []).append(row["city"])
+        return favorites
+
+    async def _get_statistics(self) -> Dict:
+        rows = await self._run(self._fetchall, "SELECT key, value FROM statistics")
+        return {row["key"]: row["value"] for row in rows}
+
+    async def get_all_users(self) -> List[int]:
+        rows = await self._run(self._fetchall, "SELECT user_id FROM users")
+        return [row["user_id"] for row in rows]
+
+    @staticmethod
+    def _user_row_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "username": row["username"],
+            "first_seen": row["first_seen"],
+            "last_activity": row["last_activity"],
+            "request_count": row["request_count"]
+        }
+
+    async def _get_users(self) -> Dict[str, Dict]:
+        rows = await self._run(self._fetchall, "SELECT * FROM users")
+        return {str(row["user_id"]): self._user_row_to_dict(row) for row in rows}
+
+    async def _get_user_info(self, user_id: int) -> Optional[Dict]:
+        row = await self._run(self._fetchone, "SELECT * FROM users WHERE user_id = ?", (user_id,))
+        return self._user_row_to_dict(row) if row else None
+
+    async def ban_user(self, user_id: int, reason: str = "Нарушение правил", admin_id: int = None) -> bool:
+        rowcount = await self._write(
+            self._execute,
+            "INSERT OR IGNORE INTO banned_users (user_id, reason, banned_at, banned_by) VALUES (?, ?, ?, ?)",
+            (user_id, reason, str(datetime.now()), admin_id)
+        )
+        if rowcount:
+            self._banned_ids.add(user_id)
+            logger.info(f"Пользователь {user_id} заблокирован админом {admin_id}. Причина: {reason}")
+        return rowcount > 0
+
+    async def unban_user(self, user_id: int, admin_id: int = None) -> bool:
+        rowcount = await self._write(self._execute, "DELETE FROM banned_users WHERE user_id = ?", (user_id,))
+        if rowcount:
+            self._banned_ids.discard(user_id)
+            logger.info(f"Пользователь {user_id} разблокирован админом {admin_id}")
+        return rowcount > 0
+
+    @staticmethod
+    def _ban_row_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "reason": row["reason"],
+            "banned_at": row["banned_at"],
+            "banned_by": row["banned_by"]
+        }
+
+    async def get_ban_info(self, user_id: int) -> Optional[Dict]:
+        row = await self._run(self._fetchone, "SELECT * FROM banned_users WHERE user_id = ?", (user_id,))
+        return self._ban_row_to_dict(row) if row else None
+
+    async def get_banned_users(self) -> Dict[str, Dict]:
+        rows = await self._run(self._fetchall, "SELECT * FROM banned_users ORDER BY rowid")
+        return {str(row["user_id"]): self._ban_row_to_dict(row) for row in rows}
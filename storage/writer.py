@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_text(path: Path, content: str):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def append_text(path: Path, content: str):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class SerialWriter:
+    """Очередь записи с единственным исполнителем: операции выполняются строго по одной."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+        self.writes = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, func: Callable, *args) -> Any:
+        if self._task is None:
+            return await self._execute(func, args)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, future))
+        return await future
+
+    async def _worker(self):
+        while True:
+            func, args, future = await self._queue.get()
+            try:
+                result = await self._execute(func, args)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, func: Callable, args: tuple) -> Any:
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            self.writes += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def metrics(self) -> Dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "writes": self.writes,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency * 1000, 2),
+            "avg_latency_ms": round(self.total_latency / self.writes * 1000, 2) if self.writes else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2)
+        }
+
+
+class PeriodicTask:
+    """Фоновая задача, вызывающая func каждые interval секунд.
+
+    interval может быть функцией, если пауза зависит от состояния владельца. Ошибка одного вызова
+    записывается в лог и не останавливает цикл.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            func: Callable[[], Awaitable[Any]],
+            interval: Union[float, Callable[[], float]],
+            run_immediately: bool = False
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self):
+        if not self.run_immediately:
+            await asyncio.sleep(self._next_interval())
+        while True:
+            try:
+                await self.func()
+            except Exception as e:
+                logger.error(f"Ошибка фоновой задачи «{self.name}»: {e}")
+            await asyncio.sleep(self._next_interval())
+
+    def _next_interval(self) -> float:
+        return self.interval() if callable(self.interval) else self.interval
+
+
+class PeriodicSaver:
+    """Отложенное сохранение изменённого состояния: раз в interval секунд и при закрытии.
+
+    snapshot() вызывается в event loop и возвращает данные для записи, write(data) выполняется в отдельном потоке.
+    Если запись не удалась, изменения остаются помеченными и сохраняются следующей попыткой.
+    """
+
+    def __init__(self, name: str, snapshot: Callable[[], Any], write: Callable[[Any], None], interval: float = 60):
+        self.name = name
+        self.snapshot = snapshot
+        self.write = write
+        self.dirty = False
+        self._task = PeriodicTask(f"сохранение {name}", self.save, interval)
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    async def save(self) -> bool:
+        if not self.dirty:
+            return True
+
+        self.dirty = False
+        try:
+            await asyncio.to_thread(self.write, self.snapshot())
+            return True
+        except Exception as e:
+            self.dirty = True
+            logger.error(f"Ошибка сохранения {self.name}: {e}")
+            return False
+
+    def start(self):
+        self._task.start()
+
+    async def close(self):
+        await self._task.stop()
+        await self.save()
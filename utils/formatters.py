@@ -1,43 +1,41 @@
 from datetime import datetime
-def format_weather_message(weather_data: dict) -> str:
-    location = weather_data.get('location', {})
-    current = weather_data.get('current', {})
-
-    city = location.get('name', 'Неизвестный город')
-    country = location.get('country', '')
-    region = location.get('region', '')
-
-    temp = current.get('temperature', 'N/A')
-    feels_like = current.get('feelslike', 'N/A')
-    description = ', '.join(current.get('weather_descriptions', ['Нет описания']))
-    humidity = current.get('humidity', 'N/A')
-    wind_speed = current.get('wind_speed', 'N/A')
-    wind_dir = current.get('wind_dir', 'N/A')
-    pressure = current.get('pressure', 'N/A')
-    uv_index = current.get('uv_index', 'N/A')
-    visibility = current.get('visibility', 'N/A')
-
-    location_str = city
-    if region and region != city:
-        location_str += f", {region}"
-    if country:
-        location_str += f", {country}"
+
+from services.weather_record import WeatherRecord
+
+
+def format_weather_message(weather: WeatherRecord) -> str:
+    location_str = weather.name
+    if weather.region and weather.region != weather.name:
+        location_str += f", {weather.region}"
+    if weather.country:
+        location_str += f", {weather.country}"
+
+    stale_note = ""
+    if weather.stale_age:
+        stale_note = f"\n⚠️ **Данные получены {_format_age(weather.stale_age)} назад**\n"
 
     return f"""
 🌤 **Погода в {location_str}**
-
-🌡 **Температура:** {temp}°C (ощущается как {feels_like}°C)
-📝 **Описание:** {description}
-💧 **Влажность:** {humidity}%
-💨 **Ветер:** {wind_speed} км/ч, {wind_dir}
-🗜 **Давление:** {pressure} мб
-☀️ **УФ-индекс:** {uv_index}
-👁 **Видимость:** {visibility} км
+{stale_note}
+🌡 **Температура:** {weather.temperature}°C (ощущается как {weather.feelslike}°C)
+📝 **Описание:** {', '.join(weather.descriptions)}
+💧 **Влажность:** {weather.humidity}%
+💨 **Ветер:** {weather.wind_speed} км/ч, {weather.wind_dir}
+🗜 **Давление:** {weather.pressure} мб
+☀️ **УФ-индекс:** {weather.uv_index}
+👁 **Видимость:** {weather.visibility} км
 
 📅 **Время запроса:** {datetime.now().strftime('%d.%m.%Y %H:%M')}
 """
 
 
+def _format_age(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes} мин"
+    return f"{minutes // 60} ч {minutes % 60} мин"
+
+
 def format_user_list(users: list) -> str:
     if not users:
         return "📭 Список пуст"